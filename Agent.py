@@ -1,9 +1,18 @@
+import os
 import time
+import argparse
 import random
 import pygame
 import pickle
+import logging
+import dataclasses
 import numpy as np
-from Drone_Env import DroneEnv
+from Drone_Env import DroneEnv, add_config_arguments, config_from_args
+from Checkpoint import is_checkpoint_path, save_checkpoint, load_checkpoint
+from Planner import plan_q_table
+from Training_Metrics import TrainingMetrics, add_logging_arguments, setup_logging
+
+logger = logging.getLogger(__name__)
 
 class QLearningAgent:
     def __init__(self, env: DroneEnv, alpha: float=0.1, gamma: float=0.9, epsilon: float=0.2) -> None:
@@ -24,139 +33,286 @@ class QLearningAgent:
         self.gamma = gamma  # Discount factor
         self.epsilon = epsilon  # Exploration rate
         
-        self.q_table = {}
+        # Sized from the environment's state space, 6 x 32 x 3 by default
+        self.num_speeds = self.env.config.num_speeds
+        self.num_distances = self.env.config.num_distances # The last bin is the distance when target is not visible
+        self.num_actions = 3
+
+        self.episodes_trained = 0
+        self.initialize_q_table()
         
-    def get_state_key(self, state: tuple) -> tuple:
+    def get_state_key(self, state: tuple | np.ndarray) -> tuple:
         """
             Convert state (drone_speed, drone_distance) into a tuple for Q-table indexing.
 
             Args:
-                state (tuple): The current state of the environment.
+                state (tuple | np.ndarray): The current state of the environment, or an (N, 2) array of states.
+
+            Returns:
+                tuple: (speed, distance) index into the Q-table. For a batch of states both entries are int arrays.
+
+            Raises:
+                ValueError: If a speed or distance is negative, which NumPy would otherwise wrap around.
         """
         
-        speed, distance = state
+        if np.ndim(state) == 2:
+            states = np.asarray(state, dtype=np.intp)
+            if states.size and states.min() < 0:
+                raise ValueError(f"States must not be negative, got {states[(states < 0).any(axis=1)][0].tolist()}")
+            return (states[:, 0], states[:, 1])
+
+        speed, distance = int(state[0]), int(state[1])
+        if speed < 0 or distance < 0:
+            raise ValueError(f"State must not be negative, got {(speed, distance)}")
         return (speed, distance)
 
     def initialize_q_table(self) -> None:
         """
             Initialize Q-table with zeros for all possible state-action pairs.
+
+            The Q-table is a dense (speed, distance, action) array indexed by get_state_key.
         """
         
-        for speed in range(6):
-            for distance in range(0, 32): # 0 to 31, 31 is the distance when target is not visible
-                self.q_table[(speed, distance)] = [0.0, 0.0, 0.0]
+        self.q_table = np.zeros((self.num_speeds, self.num_distances, self.num_actions))
     
-    def choose_action(self, state: tuple) -> int:
+    def choose_action(self, state: tuple | np.ndarray) -> int | np.ndarray:
         """
             Choose an action based on epsilon-greedy strategy.
         
             Args:
-                state: Current state (drone_speed, drone_distance).
+                state: Current state (drone_speed, drone_distance), or an (N, 2) array of states.
         
             Returns:
-                action: The action to take (0: Increase, 1: Decrease, 2: Constant).
+                action: The action to take (0: Increase, 1: Decrease, 2: Constant), or one action per state.
         """
 
+        if np.ndim(state) == 2:
+            actions = self.q_table[self.get_state_key(state)].argmax(axis=1)
+            explore = np.random.random(len(actions)) < self.epsilon
+            actions[explore] = np.random.randint(0, self.num_actions, size=np.count_nonzero(explore))
+            return actions
+
         if random.uniform(0, 1) < self.epsilon:
             return random.choice([0, 1, 2])  # Exploration: random action
         
         else:
-            speed, distance = state
-            return np.argmax(self.q_table[(speed, distance)])  # Exploitation: best action based on Q-values
+            return self.q_table[self.get_state_key(state)].argmax()  # Exploitation: best action based on Q-values
     
-    def update_q_value(self, state: tuple, action: int, reward: float, next_state: tuple) -> None:
+    def update_q_value(self, state: tuple | np.ndarray, action: int | np.ndarray, reward: float | np.ndarray, next_state: tuple | np.ndarray) -> None:
         """
             Update Q-value based on the Q-learning update rule.
+
+            Batches of transitions are applied in one go: updates that hit the same state-action pair are summed,
+            each computed from the Q-values before the batch.
             
             Args:
-                state: Current state (drone_speed, drone_distance).
-                action: The action taken by the agent.
-                reward: The reward received from the environment.
-                next_state: The next state (drone_speed, drone_distance).
+                state: Current state (drone_speed, drone_distance), or an (N, 2) array of states.
+                action: The action taken by the agent, or one action per state.
+                reward: The reward received from the environment, or one reward per state.
+                next_state: The next state (drone_speed, drone_distance), or an (N, 2) array of states.
+
+            Returns:
+                float | np.ndarray: The change made to the Q-value, or one change per transition.
         """
         
-        speed, distance = state
-        next_speed, next_distance = next_state
+        key = self.get_state_key(state)
+        next_key = self.get_state_key(next_state)
+
+        if np.ndim(state) == 2:
+            index = key + (np.asarray(action, dtype=np.intp),)
+            max_future_q = self.q_table[next_key].max(axis=1)
+            current_q = self.q_table[index]
 
-        max_future_q = np.max(self.q_table[(next_speed, next_distance)])
-        current_q = self.q_table[(speed, distance)][action]
+            # Q-learning update rule
+            deltas = self.alpha * (reward + self.gamma * max_future_q - current_q)
+            np.add.at(self.q_table, index, deltas)
+            return deltas
+
+        max_future_q = self.q_table[next_key].max()
+        current_q = self.q_table[key][action]
         
         # Q-learning update rule
-        new_q = current_q + self.alpha * (reward + self.gamma * max_future_q - current_q)
-        self.q_table[(speed, distance)][action] = new_q
+        delta = self.alpha * (reward + self.gamma * max_future_q - current_q)
+        self.q_table[key][action] = current_q + delta
+        return delta
 
     def save_agent(self, filename: str = "agent.pkl") -> None:
         """
-            Save the agent's Q-table to a file using pickle.
+            Save the agent's Q-table to a file.
+
+            File names ending in .qtable get a checkpoint (see Checkpoint.py) that records the hyperparameters and
+            the episode count, anything else is pickled.
 
             Args:
                 filename (str): The path to the file where the Q-table will be saved. Default is "agent.pkl".
         """
 
-        with open(filename, 'wb') as f:
-            pickle.dump(self.q_table, f)
-        print(f"Agent saved to {filename}")
+        if is_checkpoint_path(filename):
+            save_checkpoint(filename, self.q_table, alpha=self.alpha, gamma=self.gamma, epsilon=self.epsilon,
+                            episodes=self.episodes_trained, config=dataclasses.asdict(self.env.config))
+        else:
+            with open(filename, 'wb') as f:
+                pickle.dump(self.q_table, f)
+        logger.info("Agent saved to %s", filename)
     
-    def load_agent(self, filename: str = "agent.pkl") -> None:
+    def load_agent(self, filename: str = "agent.pkl", read_only: bool = False) -> None:
         """
-            Load the agent's Q-table from a file using pickle.
+            Load the agent's Q-table from a file saved by save_agent.
+
+            Pickles written before the dense Q-table, which hold a dict of (speed, distance) -> [q0, q1, q2],
+            are converted on load. Only load pickles from trusted sources.
 
             Args:
                 filename (str): The path to the file where the Q-table is saved. Default is "agent.pkl".
+                read_only (bool): Memory-map a checkpoint read-only instead of copying it, for processes that only
+                    run the policy. The Q-table can then not be trained further.
         """
 
         try:
-            with open(filename, 'rb') as f:
-                self.q_table = pickle.load(f)
-            print(f"Agent loaded from {filename}")
+            if is_checkpoint_path(filename):
+                q_table, header = load_checkpoint(filename, mmap=read_only)
+                self.episodes_trained = header.get("episodes", 0)
+            else:
+                with open(filename, 'rb') as f:
+                    q_table = pickle.load(f)
+            logger.info("Agent loaded from %s", filename)
         except FileNotFoundError:
-            print(f"File {filename} not found. Starting with an empty Q-table.")
+            logger.warning("File %s not found. Starting with an empty Q-table.", filename)
             self.initialize_q_table()
+            return
+
+        if isinstance(q_table, dict):
+            self.initialize_q_table()
+            for key, q_values in q_table.items():
+                self.q_table[self.get_state_key(key)] = q_values
+            return
+
+        if np.shape(q_table) != (self.num_speeds, self.num_distances, self.num_actions):
+            raise ValueError(f"{filename} holds a {np.shape(q_table)} Q-table, the environment's state space needs "
+                             f"{(self.num_speeds, self.num_distances, self.num_actions)}")
+        if read_only:
+            self.q_table = q_table
+        else:
+            self.q_table = np.array(q_table, dtype=np.float64)
     
-    def train(self, episodes: int=1000, delay: int=500) -> None:
+    def plan(self, tolerance: float = 1e-10) -> None:
+        """
+            Fill the Q-table by solving the environment exactly with value iteration instead of learning it.
+
+            Args:
+                tolerance: Convergence threshold of value iteration.
+        """
+
+        self.q_table = plan_q_table(self.env.config, self.gamma, tolerance)
+        self.episodes_trained = 0
+
+    def train(self, episodes: int=1000, delay: int=500, headless: bool=False, render_every: int=0,
+              checkpoint_every: int=0, checkpoint_path: str="agent_checkpoint.qtable", resume: bool=False,
+              metrics: TrainingMetrics | None = None, stop_when=None) -> None:
         """
             Train the Q-learning agent by interacting with the environment.
 
             Args:
                 episodes: Number of episodes to train the agent.
                 delay: Delay between episodes (in milliseconds).
+                headless: Skip rendering, the per-step sleep and the delay between episodes.
+                render_every: In headless mode, still render every N-th episode (0 disables).
+                    Ignored when the environment itself has no display.
+                checkpoint_every: Save a checkpoint to checkpoint_path every N episodes (0 disables).
+                checkpoint_path: Where periodic checkpoints go.
+                resume: Continue from the Q-table and episode count in checkpoint_path if it exists, up to a
+                    total of episodes. The random state is not saved, so a resumed run does not repeat the
+                    exploration of an uninterrupted one.
+                metrics: Record per-episode return, length, Q-value changes and steps per second here.
+                stop_when: Called with the number of episodes trained after every episode; training stops early
+                    when it returns True.
         """
         
-        self.initialize_q_table()
+        if resume and os.path.exists(checkpoint_path):
+            self.load_agent(checkpoint_path)
+        else:
+            self.initialize_q_table()
+            self.episodes_trained = 0
 
-        for episode in range(episodes):
-            print(f"Episode {episode}/{episodes}")
+        for episode in range(self.episodes_trained, episodes):
+            logger.debug("Episode %d/%d", episode, episodes)
+
+            render = not self.env.headless and (not headless or (render_every > 0 and episode % render_every == 0))
 
             state = self.env.reset(target_position=(5 * self.env.screen_width // 6, self.env.screen_height // 2))
             done = False
             total_reward = 0
+            steps = 0
+            abs_delta_sum = 0.0
+            max_abs_delta = 0.0
+            start = time.perf_counter()
 
             while not done:
-                if pygame.event.get(pygame.QUIT):
+                if render and pygame.event.get(pygame.QUIT):
                     pygame.quit()
                     quit()
 
                 action = self.choose_action(state)
                 next_state, reward, done, _ = self.env.step(action)
-                self.update_q_value(state, action, reward, next_state)
+                delta = abs(self.update_q_value(state, action, reward, next_state))
                 state = next_state
                 total_reward += reward
+                steps += 1
+                abs_delta_sum += delta
+                if delta > max_abs_delta:
+                    max_abs_delta = delta
 
-                self.env.render()
-                pygame.display.flip()
-                
-                time.sleep(0.1)
-                # pygame.time.wait(3000)
+                if render:
+                    self.env.render()
+                    
+                    time.sleep(0.1)
+                    # pygame.time.wait(3000)
 
             # pygame.time.wait(3000)
-            pygame.time.wait(delay)
+            elapsed = time.perf_counter() - start
+            if metrics is not None:
+                metrics.record(episode, total_reward, steps, abs_delta_sum / steps, max_abs_delta, steps / elapsed)
+
+            if render:
+                pygame.time.wait(delay)
             if episode % 10 == 0:
-                print(f"Episode {episode}/{episodes}, Total Reward: {total_reward}")
+                logger.info("Episode %d/%d, Total Reward: %d", episode, episodes, total_reward)
+
+            self.episodes_trained = episode + 1
+            if checkpoint_every > 0 and self.episodes_trained % checkpoint_every == 0:
+                self.save_agent(checkpoint_path)
+            if stop_when is not None and stop_when(self.episodes_trained):
+                break
 
 if __name__ == "__main__":
-    env = DroneEnv()
+    parser = argparse.ArgumentParser(description="Train the Q-learning agent.")
+    parser.add_argument("--episodes", type=int, default=1000, help="Number of training episodes.")
+    parser.add_argument("--delay", type=int, default=500, help="Delay between rendered episodes (in milliseconds).")
+    parser.add_argument("--headless", action="store_true", help="Train without rendering or sleeping.")
+    parser.add_argument("--render-every", type=int, default=0, help="In headless mode, render every N-th episode (0 disables and needs no display).")
+    parser.add_argument("--output", default="agent.pkl", help="Where to save the trained agent. Use a .qtable name for a checkpoint.")
+    parser.add_argument("--checkpoint-every", type=int, default=0, help="Save a checkpoint every N episodes (0 disables).")
+    parser.add_argument("--checkpoint", default="agent_checkpoint.qtable", help="Path of the periodic checkpoint.")
+    parser.add_argument("--resume", action="store_true", help="Continue training from --checkpoint if it exists.")
+    parser.add_argument("--planner", action="store_true", help="Solve the environment with value iteration instead of training.")
+    parser.add_argument("--metrics", help="Write per-episode training metrics to this .csv or .parquet file.")
+    add_config_arguments(parser)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(args)
+
+    env = DroneEnv(headless=args.headless and args.render_every == 0, config=config_from_args(args))
     
     agent = QLearningAgent(env)
-    agent.train(episodes=1000, delay=500)
+    metrics = TrainingMetrics()
+    if args.planner:
+        agent.plan()
+    else:
+        agent.train(episodes=args.episodes, delay=args.delay, headless=args.headless, render_every=args.render_every,
+                    checkpoint_every=args.checkpoint_every, checkpoint_path=args.checkpoint, resume=args.resume,
+                    metrics=metrics)
+        logger.info("Last 100 episodes: %s", metrics.summary())
 
-    agent.save_agent("agent.pkl")
\ No newline at end of file
+    agent.save_agent(args.output)
+    if args.metrics:
+        metrics.write(args.metrics)
\ No newline at end of file
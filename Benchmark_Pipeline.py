@@ -0,0 +1,103 @@
+import time
+import argparse
+import dataclasses
+
+from Frame_Source import Gst, GstLaunchFrameSource
+from Gst_Pipeline import PRESETS, build_pipeline_description, build_sender_description
+from Metrics import MetricsRegistry, observe_glass_to_glass
+
+def count_buffers(element, pad_name="sink"):
+    """Count the buffers passing a pad of an element. Returns a one-item list that the probe keeps up to date"""
+    count = [0]
+
+    def on_buffer(pad, info):
+        count[0] += 1
+        return Gst.PadProbeReturn.OK
+
+    element.get_static_pad(pad_name).add_probe(Gst.PadProbeType.BUFFER, on_buffer)
+    return count
+
+def run_preset(config, duration=10.0, width=1280, height=720, framerate=30, consumer_delay=0.0, warmup=1.0):
+    """
+        Stream a local videotestsrc over UDP into the receiving pipeline of a config and measure what arrives.
+
+        Args:
+            config (PipelineConfig): Receiver settings. Its port and codec are used by the sender too.
+            duration (float): Seconds to measure for, after the warmup.
+            width (int): Width of the sent video.
+            height (int): Height of the sent video.
+            framerate (int): Frame rate of the sent video.
+            consumer_delay (float): Seconds to sleep after each frame, standing in for a slow tracker.
+            warmup (float): Seconds to run before measuring, so the first keyframe has arrived.
+
+        Returns:
+            dict: Received FPS, frames received and sent, arrival-to-application latency and CPU time per frame.
+                If the stream ends early, the figures cover the frames received until then.
+    """
+    registry = MetricsRegistry(window=duration + warmup)
+    source = GstLaunchFrameSource(build_pipeline_description(config))
+    sender = Gst.parse_launch(build_sender_description(config.port, config.codec, config.payload, width, height, framerate))
+    sent = count_buffers(sender.get_by_name("payloader"))
+    sender.set_state(Gst.State.PLAYING)
+
+    received = 0
+    try:
+        start = time.monotonic()
+        while time.monotonic() - start < warmup:
+            frame = source.pull()
+            if frame is None:
+                break
+            frame.release()
+
+        sent_at_start = sent[0]
+        cpu_start = time.process_time()
+        start = time.monotonic()
+        while time.monotonic() - start < duration:
+            frame = source.pull()
+            if frame is None:
+                # End of stream: report what arrived until then
+                break
+            with frame:
+                # udpsrc stamps each buffer with its arrival time, so this is arrival to application
+                observe_glass_to_glass(registry, source.pipeline, frame.pts, "arrival_to_app")
+                received += 1
+            if consumer_delay:
+                time.sleep(consumer_delay)
+        elapsed = time.monotonic() - start
+        cpu_time = time.process_time() - cpu_start
+        frames_sent = sent[0] - sent_at_start
+    finally:
+        sender.set_state(Gst.State.NULL)
+        source.close()
+
+    latency = registry.histogram("arrival_to_app").summary()
+    return {
+        "fps": received / elapsed,
+        "received": received,
+        "sent": frames_sent,
+        "p50_ms": latency.get("p50_ms"),
+        "p99_ms": latency.get("p99_ms"),
+        "cpu_ms_per_frame": cpu_time * 1000 / received if received else None,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare receiving pipeline presets against a local UDP sender.")
+    parser.add_argument("--presets", nargs="+", default=sorted(PRESETS), choices=sorted(PRESETS), help="Presets to compare.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to measure each preset for.")
+    parser.add_argument("--width", type=int, default=1280, help="Width of the sent video.")
+    parser.add_argument("--height", type=int, default=720, help="Height of the sent video.")
+    parser.add_argument("--framerate", type=int, default=30, help="Frame rate of the sent video.")
+    parser.add_argument("--consumer-delay", type=float, default=0.0, help="Milliseconds of simulated work per frame.")
+    parser.add_argument("--port", type=int, default=5600, help="Local UDP port to stream over.")
+    args = parser.parse_args()
+
+    if Gst is None:
+        raise SystemExit("GStreamer (PyGObject) is not available")
+
+    print(f"{'preset':<18}{'fps':>8}{'recv/sent':>12}{'p50 ms':>10}{'p99 ms':>10}{'cpu ms/frame':>14}")
+    for name in args.presets:
+        config = dataclasses.replace(PRESETS[name], port=args.port)
+        results = run_preset(config, args.duration, args.width, args.height, args.framerate, args.consumer_delay / 1000)
+        print(f"{name:<18}{results['fps']:>8.1f}{results['received']:>6}/{results['sent']:<5}"
+              f"{results['p50_ms'] or float('nan'):>10.2f}{results['p99_ms'] or float('nan'):>10.2f}"
+              f"{results['cpu_ms_per_frame'] or float('nan'):>14.2f}")
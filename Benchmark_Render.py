@@ -0,0 +1,98 @@
+import os
+import time
+import argparse
+
+# Render off-screen when there is no display, e.g. on CI machines
+if not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from Drone_Env import DroneEnv
+
+def render_full(env: DroneEnv, surface: pygame.Surface | None = None) -> None:
+    """
+        The previous DroneEnv.render: redraw the whole frame, grid included, and flip the display.
+
+        Args:
+            env (DroneEnv): The environment to draw.
+            surface (pygame.Surface): Draw here instead of on the screen, without flipping. The env is left alone.
+    """
+    screen = env.screen if surface is None else surface
+    screen.fill((255, 255, 255))
+
+    pygame.draw.rect(screen, env.green, (env.drone_position[0] - env.drone_dimension * 10, env.drone_position[1] - env.drone_dimension * 4, env.drone_dimension * env.scale, env.drone_dimension * env.scale))
+    pygame.draw.rect(screen, env.red, (env.target_position[0] - env.target_dimension * 10, env.target_position[1] - env.target_dimension * 4, env.target_dimension * env.scale, env.target_dimension * env.scale))
+
+    change_scale = 10
+    for i in range(int(env.screen_height // change_scale)):
+        pygame.draw.line(screen, env.black, (0, i * change_scale), (env.screen_width, i * change_scale), env.line_thickness)
+    for i in range(int(env.screen_width // change_scale)):
+        pygame.draw.line(screen, env.black, (i * change_scale, 0), (i * change_scale, env.screen_height), env.line_thickness)
+
+    window_position = round(env.target_position[0] - env.config.target_window[1] * env.scale)
+    horizon_position = round(env.drone_position[0] + env.config.horizon * env.scale)
+    for x, color in ((window_position, env.blue), (env.target_position[0] - 7 * env.scale, env.orange), (horizon_position, env.yellow)):
+        pygame.draw.line(screen, color, (x, 0), (x, env.screen_height), env.line_thickness * 2)
+        pygame.draw.line(screen, color, (x + 2, 0), (x + 2, env.screen_height), env.line_thickness * 2)
+
+    if surface is None:
+        pygame.display.flip()
+
+def run(env: DroneEnv, render, frames: int, check_against=None) -> tuple:
+    """
+        Render frames of repeated approaches from the training start.
+
+        Args:
+            env (DroneEnv): A non-headless environment.
+            render (callable): Called with the env once per frame.
+            frames (int): Number of frames.
+            check_against (callable): If given, also render every frame with this onto a separate surface and compare
+                pixels. The env's own render state is not touched, so dirty-rect erasing is checked too.
+
+        Returns:
+            tuple: Frames per second and the number of frames whose pixels differed.
+    """
+
+    target_position = (5 * env.screen_width // 6, env.screen_height // 2)
+    env.reset(target_position=target_position)
+    rng = np.random.default_rng(0)
+    mismatches = 0
+    elapsed = 0.0
+    reference = pygame.Surface((env.screen_width, env.screen_height)) if check_against is not None else None
+
+    for _ in range(frames):
+        start = time.perf_counter()
+        render(env)
+        elapsed += time.perf_counter() - start
+
+        if check_against is not None:
+            check_against(env, reference)
+            mismatches += not np.array_equal(pygame.surfarray.array3d(env.screen), pygame.surfarray.array3d(reference))
+
+        _, _, done, _ = env.step(int(rng.integers(0, 3)))
+        if done:
+            env.reset(target_position=target_position)
+        pygame.event.pump()
+
+    return frames / elapsed, mismatches
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the cached, dirty-rect DroneEnv.render with a full redraw and flip.")
+    parser.add_argument("--frames", type=int, default=1000, help="Frames to render with each renderer.")
+    parser.add_argument("--check", action="store_true", help="Also check that both renderers produce the same pixels.")
+    args = parser.parse_args()
+
+    env = DroneEnv()
+    env.set_variables()
+
+    full_fps, _ = run(env, render_full, args.frames)
+    cached_fps, mismatches = run(env, DroneEnv.render, args.frames, render_full if args.check else None)
+
+    print(f"Video driver: {pygame.display.get_driver()}")
+    print(f"Full redraw + flip: {full_fps:,.0f} FPS")
+    print(f"Cached background + dirty rects: {cached_fps:,.0f} FPS ({cached_fps / full_fps:.1f}x)")
+    if args.check:
+        print(f"Frames with differing pixels: {mismatches}")
+    pygame.quit()
@@ -0,0 +1,72 @@
+import time
+import random
+import argparse
+import itertools
+import numpy as np
+
+from Drone_Env import DroneEnv, DroneConfig
+from Agent import QLearningAgent
+from Training_Metrics import add_logging_arguments, setup_logging
+
+def benchmark_config(config: DroneConfig, episodes: int = 1000, seed: int = 0) -> dict:
+    """
+        Train a headless agent on one state space and measure its cost.
+
+        Args:
+            config (DroneConfig): The state space.
+            episodes (int): Training episodes.
+            seed (int): Seed of the exploration.
+
+        Returns:
+            dict: Table shape and size, training time, throughput and mean episode length.
+    """
+
+    random.seed(seed)
+    np.random.seed(seed)
+
+    env = DroneEnv(headless=True, config=config)
+    agent = QLearningAgent(env)
+
+    steps = 0
+    step = env.step
+
+    def counted_step(action):
+        nonlocal steps
+        steps += 1
+        return step(action)
+
+    env.step = counted_step
+
+    start = time.perf_counter()
+    agent.train(episodes=episodes, headless=True)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "shape": agent.q_table.shape,
+        "table_kib": agent.q_table.nbytes / 1024,
+        "seconds": elapsed,
+        "episodes_per_sec": episodes / elapsed,
+        "steps_per_sec": steps / elapsed,
+        "mean_episode_steps": steps / episodes,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how training time and memory scale with the size of the state space.")
+    parser.add_argument("--episodes", type=int, default=1000, help="Training episodes per state space.")
+    parser.add_argument("--horizons", type=float, nargs="+", default=[30.0, 60.0, 120.0], help="Horizons in meters.")
+    parser.add_argument("--resolutions", type=float, nargs="+", default=[1.0, 0.5, 0.25], help="Distance bin widths in meters.")
+    parser.add_argument("--speed-resolution", type=float, default=1.0, help="Meters per step at speed level 1, kept fixed so finer bins do not lengthen episodes.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the exploration.")
+    add_logging_arguments(parser)
+    parser.set_defaults(log_level="WARNING")
+    args = parser.parse_args()
+    setup_logging(args)
+
+    print(f"{'horizon':>8}{'bin m':>7}{'shape':>16}{'table KiB':>11}{'seconds':>9}{'episodes/s':>12}{'steps/s':>10}{'steps/ep':>10}")
+    for horizon, resolution in itertools.product(args.horizons, args.resolutions):
+        # Keep the original proportions: the world is 2.5 horizons long
+        config = DroneConfig(world_length=2.5 * horizon, horizon=horizon, distance_resolution=resolution,
+                             speed_resolution=args.speed_resolution)
+        results = benchmark_config(config, args.episodes, args.seed)
+        print(f"{horizon:>8.0f}{resolution:>7.2f}{str(results['shape']):>16}{results['table_kib']:>11.1f}{results['seconds']:>9.2f}"
+              f"{results['episodes_per_sec']:>12.0f}{results['steps_per_sec']:>10.0f}{results['mean_episode_steps']:>10.1f}")
@@ -0,0 +1,121 @@
+import os
+import csv
+import time
+import argparse
+import numpy as np
+
+from Tracker import Tracker, TRACKER_BACKENDS
+from Frame_Source import GstLaunchFrameSource, VideoFileFrameSource, ImageDirectoryFrameSource, SyntheticFrameSource
+
+def iou(box_a, box_b):
+    """Intersection over union of two (x, y, w, h) boxes"""
+    x1 = max(box_a[0], box_b[0])
+    y1 = max(box_a[1], box_b[1])
+    x2 = min(box_a[0] + box_a[2], box_b[0] + box_b[2])
+    y2 = min(box_a[1] + box_a[3], box_b[1] + box_b[3])
+
+    intersection = max(0, x2 - x1) * max(0, y2 - y1)
+    union = box_a[2] * box_a[3] + box_b[2] * box_b[3] - intersection
+    return intersection / union if union > 0 else 0.0
+
+def load_ground_truth(path):
+    """Read a CSV of x,y,w,h rows, one per frame"""
+    with open(path, newline="") as f:
+        return [tuple(int(float(v)) for v in row[:4]) for row in csv.reader(f) if row and not row[0].startswith("#")]
+
+def open_source(source, num_frames):
+    """Create a frame source from a CLI argument: 'synthetic', 'gst:<pipeline>', a directory or a video file"""
+    if source == "synthetic":
+        return SyntheticFrameSource(num_frames=num_frames)
+    if source.startswith("gst:"):
+        return GstLaunchFrameSource(source[len("gst:"):])
+    if os.path.isdir(source):
+        return ImageDirectoryFrameSource(source)
+    return VideoFileFrameSource(source)
+
+def run_benchmark(frame_source, tracker, bbox=None, ground_truth=None, max_frames=None, warmup=5):
+    """
+        Lock the tracker on the first frame and time track_object on every following one.
+
+        Args:
+            frame_source (FrameSource): Where frames come from.
+            tracker (Tracker): The tracker under test.
+            bbox (tuple): Initial (x, y, w, h). Defaults to the source's or the file's ground truth of frame 0.
+            ground_truth (list): Per-frame (x, y, w, h) boxes, overriding the ones the source provides.
+            max_frames (int): Stop after this many frames.
+            warmup (int): Leading tracked frames left out of the latency figures.
+
+        Returns:
+            dict: frames, fps, p50/p99/max latency in milliseconds, mean IoU, success rate (IoU > 0.5) and the
+                number of backend initializations, which counts window moves and re-acquisitions.
+    """
+    latencies = []
+    overlaps = []
+
+    for index, frame in enumerate(frame_source):
+        if max_frames is not None and index >= max_frames:
+            frame.release()
+            break
+
+        with frame:
+            truth = ground_truth[index] if ground_truth and index < len(ground_truth) else frame.ground_truth
+
+            if index == 0:
+                initial = bbox or truth
+                if initial is None:
+                    raise ValueError("No initial bbox: pass --bbox or a source with ground truth")
+                tracker.lock_object(frame.image, tuple(initial))
+                continue
+
+            start = time.perf_counter()
+            result = tracker.track_object(frame.image)
+            elapsed = time.perf_counter() - start
+
+            if index > warmup:
+                latencies.append(elapsed)
+            if truth is not None:
+                overlaps.append(iou(result, truth) if result else 0.0)
+
+    frame_source.close()
+    tracker.close()
+
+    if not latencies:
+        raise ValueError("Not enough frames to benchmark")
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "frames": len(latencies),
+        "fps": 1000 / latencies.mean(),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+        "mean_iou": float(np.mean(overlaps)) if overlaps else None,
+        "success_rate": float(np.mean(np.array(overlaps) > 0.5)) if overlaps else None,
+        "backend_inits": tracker.backend_inits,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Tracker headless on a recorded or synthetic video.")
+    parser.add_argument("--source", default="synthetic", help="'synthetic', 'gst:<pipeline ending in appsink name=mysink>', an image directory or a video file.")
+    parser.add_argument("--bbox", help="Initial bbox as x,y,w,h. Defaults to the ground truth of the first frame.")
+    parser.add_argument("--ground-truth", help="CSV with one x,y,w,h row per frame.")
+    parser.add_argument("--frames", type=int, default=300, help="Maximum number of frames.")
+    parser.add_argument("--backend", default="csrt", choices=sorted(TRACKER_BACKENDS) + ["adaptive"], help="Tracker backend.")
+    parser.add_argument("--frame-budget", type=float, default=33.0, help="Per-frame budget (ms) of the adaptive backend.")
+    parser.add_argument("--roi", action="store_true", help="Track on a search window around the target.")
+    parser.add_argument("--work-size", type=int, default=None, help="Downscale the search window to at most this many pixels.")
+    parser.add_argument("--motion-model", action="store_true", help="Filter the bbox through a constant-velocity Kalman filter.")
+    parser.add_argument("--update-interval", type=int, default=1, help="With --motion-model, run the backend every N frames.")
+    parser.add_argument("--warmup", type=int, default=5, help="Tracked frames left out of the latency figures.")
+    args = parser.parse_args()
+
+    bbox = tuple(int(v) for v in args.bbox.split(",")) if args.bbox else None
+    ground_truth = load_ground_truth(args.ground_truth) if args.ground_truth else None
+
+    results = run_benchmark(open_source(args.source, args.frames), Tracker(args.backend, args.frame_budget, roi=args.roi, work_size=args.work_size,
+                                   motion_model=args.motion_model, update_interval=args.update_interval), bbox, ground_truth, args.frames, args.warmup)
+
+    print(f"Backend: {args.backend}, frames: {results['frames']}, FPS: {results['fps']:.1f}, backend inits: {results['backend_inits']}")
+    print(f"Latency p50: {results['p50_ms']:.2f} ms, p99: {results['p99_ms']:.2f} ms, max: {results['max_ms']:.2f} ms")
+    if results["mean_iou"] is not None:
+        print(f"Mean IoU: {results['mean_iou']:.3f}, success rate: {results['success_rate']:.1%}")
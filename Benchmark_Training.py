@@ -0,0 +1,180 @@
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import subprocess
+import numpy as np
+
+from Drone_Env import DroneEnv
+from Vector_Drone_Env import VectorDroneEnv
+from Agent import QLearningAgent
+from Parallel_Train import evaluate_greedy
+from Training_Metrics import add_logging_arguments, setup_logging
+
+def seed_everything(seed: int) -> None:
+    """Seed both random number generators the agent draws from"""
+    random.seed(seed)
+    np.random.seed(seed)
+
+def bench_env_steps(steps: int = 200_000, seed: int = 0) -> float:
+    """
+        Returns:
+            float: DroneEnv.step calls per second with random actions, resetting finished episodes.
+    """
+
+    env = DroneEnv(headless=True)
+    env.set_variables()
+    actions = np.random.default_rng(seed).integers(0, 3, size=steps).tolist()
+    target_position = (5 * env.screen_width // 6, env.screen_height // 2)
+    env.reset(target_position=target_position)
+
+    start = time.perf_counter()
+    for action in actions:
+        _, _, done, _ = env.step(action)
+        if done:
+            env.reset(target_position=target_position)
+    return steps / (time.perf_counter() - start)
+
+def bench_vector_env_steps(num_envs: int = 4096, steps: int = 200, seed: int = 0) -> float:
+    """
+        Returns:
+            float: Lane steps per second of VectorDroneEnv with random actions.
+    """
+
+    env = VectorDroneEnv(num_envs)
+    actions = np.random.default_rng(seed).integers(0, 3, size=(steps, num_envs))
+
+    start = time.perf_counter()
+    for step_actions in actions:
+        env.step(step_actions)
+    return num_envs * steps / (time.perf_counter() - start)
+
+def bench_agent_updates(updates: int = 200_000, batch_size: int = 4096, seed: int = 0) -> dict:
+    """
+        Returns:
+            dict: QLearningAgent.update_q_value transitions per second, one at a time and in batches.
+    """
+
+    agent = QLearningAgent(DroneEnv(headless=True))
+    rng = np.random.default_rng(seed)
+    states = np.stack((rng.integers(0, agent.num_speeds, updates), rng.integers(0, agent.num_distances, updates)), axis=1)
+    next_states = np.stack((rng.integers(0, agent.num_speeds, updates), rng.integers(0, agent.num_distances, updates)), axis=1)
+    actions = rng.integers(0, agent.num_actions, updates)
+    rewards = rng.integers(-1, 3, updates)
+
+    scalar = list(zip(map(tuple, states.tolist()), actions.tolist(), rewards.tolist(), map(tuple, next_states.tolist())))
+    start = time.perf_counter()
+    for state, action, reward, next_state in scalar:
+        agent.update_q_value(state, action, reward, next_state)
+    scalar_rate = updates / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, updates, batch_size):
+        agent.update_q_value(states[i:i + batch_size], actions[i:i + batch_size], rewards[i:i + batch_size], next_states[i:i + batch_size])
+    batched_rate = updates / (time.perf_counter() - start)
+
+    return {"updates_per_sec": scalar_rate, "batched_updates_per_sec": batched_rate}
+
+def episodes_to_convergence(seed: int = 0, max_episodes: int = 5000, check_every: int = 10) -> dict:
+    """
+        Train from scratch until the greedy policy earns the optimal return from the training start, as computed
+        by the planner.
+
+        Returns:
+            dict: Episodes needed (None if max_episodes was not enough) and training episodes per second.
+    """
+
+    seed_everything(seed)
+    agent = QLearningAgent(DroneEnv(headless=True))
+
+    optimal = QLearningAgent(DroneEnv(headless=True), epsilon=0.0)
+    optimal.plan()
+    optimal_return = evaluate_greedy(optimal)
+
+    converged_at = []
+
+    def converged(episodes):
+        if episodes % check_every == 0 and evaluate_greedy(agent) >= optimal_return:
+            converged_at.append(episodes)
+            return True
+        return False
+
+    start = time.perf_counter()
+    agent.train(episodes=max_episodes, headless=True, stop_when=converged)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "episodes_to_convergence": converged_at[0] if converged_at else None,
+        "episodes_per_sec": agent.episodes_trained / elapsed,
+    }
+
+def git_revision() -> dict:
+    """The commit the benchmark ran on and whether the tree had local changes"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=directory, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=directory,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+def run_suite(seed: int = 0, seeds: int = 5, max_episodes: int = 5000) -> dict:
+    """
+        Run every benchmark with fixed seeds.
+
+        Args:
+            seed (int): Seed of the throughput benchmarks and the first convergence run.
+            seeds (int): Number of convergence runs, with seeds seed, seed + 1, ...
+            max_episodes (int): Episode limit of a convergence run.
+
+        Returns:
+            dict: The results, keyed by benchmark.
+    """
+
+    seed_everything(seed)
+    results = {"env_steps_per_sec": bench_env_steps(seed=seed), "vector_env_steps_per_sec": bench_vector_env_steps(seed=seed)}
+    results.update(bench_agent_updates(seed=seed))
+
+    runs = [episodes_to_convergence(seed + i, max_episodes) for i in range(seeds)]
+    episodes = [run["episodes_to_convergence"] for run in runs]
+    reached = [count for count in episodes if count is not None]
+    results["converged_runs"] = len(reached)
+    results["median_episodes_to_convergence"] = float(np.median(reached)) if reached else None
+    results["training_episodes_per_sec"] = float(np.mean([run["episodes_per_sec"] for run in runs]))
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seeded training benchmarks, appended to a history file to compare commits.")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed.")
+    parser.add_argument("--seeds", type=int, default=5, help="Number of seeded convergence runs.")
+    parser.add_argument("--max-episodes", type=int, default=5000, help="Episode limit of a convergence run.")
+    parser.add_argument("--history", default="training_benchmarks.jsonl", help="JSON-lines file the results are appended to.")
+    add_logging_arguments(parser)
+    parser.set_defaults(log_level="WARNING")
+    args = parser.parse_args()
+    setup_logging(args)
+
+    record = dict(git_revision(), timestamp=time.time(), python=platform.python_version(), numpy=np.__version__,
+                  seed=args.seed, seeds=args.seeds, results=run_suite(args.seed, args.seeds, args.max_episodes))
+
+    previous = None
+    if os.path.exists(args.history):
+        with open(args.history) as f:
+            lines = [line for line in f if line.strip()]
+        previous = json.loads(lines[-1]) if lines else None
+
+    print(f"Commit {record['commit'] or 'unknown'}{' (dirty)' if record['dirty'] else ''}")
+    for name, value in record["results"].items():
+        line = f"  {name}: {value:,.1f}" if isinstance(value, float) else f"  {name}: {value}"
+        old = previous["results"].get(name) if previous else None
+        if isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+            line += f" ({(value - old) / old:+.1%} vs {previous['commit'][:8] if previous['commit'] else 'previous run'})"
+        print(line)
+
+    with open(args.history, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"Appended to {args.history}", file=sys.stderr)
@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import struct
+import hashlib
+import argparse
+import numpy as np
+
+from Training_Metrics import add_logging_arguments, setup_logging
+
+# File layout: magic, format version (uint16), header length (uint32), JSON header, zero padding up to a 64-byte
+# boundary, then the raw little-endian Q-table in C order
+MAGIC = b"QTABLE\x00\x00"
+VERSION = 1
+CHECKPOINT_EXTENSION = ".qtable"
+ALIGNMENT = 64
+
+_PREFIX = struct.Struct("<8sHI")
+
+class CheckpointError(ValueError):
+    """Raised for files that are not valid Q-table checkpoints"""
+
+def is_checkpoint_path(filename):
+    """Whether a file name uses the checkpoint format rather than pickle"""
+    return str(filename).endswith(CHECKPOINT_EXTENSION)
+
+def save_checkpoint(filename, q_table, **metadata):
+    """
+        Write a Q-table checkpoint.
+
+        The file is written next to the target and renamed over it, so readers never see a partial checkpoint.
+
+        Args:
+            filename (str): Where to write the checkpoint.
+            q_table (np.ndarray): The Q-table.
+            **metadata: JSON-serializable extras, e.g. alpha, gamma, epsilon and episodes.
+    """
+    data = np.ascontiguousarray(q_table, dtype="<f8")
+    header = dict(metadata, dtype=data.dtype.str, shape=list(data.shape), sha256=hashlib.sha256(data).hexdigest())
+    header_bytes = json.dumps(header).encode()
+
+    data_offset = _PREFIX.size + len(header_bytes)
+    padding = -data_offset % ALIGNMENT
+
+    temporary = f"{filename}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\x00" * padding)
+        f.write(data.tobytes())
+    os.replace(temporary, filename)
+
+def read_header(filename):
+    """
+        Read the header of a checkpoint without touching the Q-table.
+
+        Returns:
+            dict: The metadata plus dtype, shape, sha256, version and the data offset in bytes.
+    """
+    with open(filename, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise CheckpointError(f"{filename} is too short to be a checkpoint")
+
+        magic, version, header_length = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise CheckpointError(f"{filename} is not a Q-table checkpoint")
+        if version > VERSION:
+            raise CheckpointError(f"{filename} has format version {version}, this code reads up to {VERSION}")
+
+        header = json.loads(f.read(header_length))
+
+    data_offset = _PREFIX.size + header_length
+    header["version"] = version
+    header["data_offset"] = data_offset + (-data_offset % ALIGNMENT)
+    return header
+
+def load_checkpoint(filename, mmap=True, verify=True):
+    """
+        Load a Q-table checkpoint.
+
+        Args:
+            filename (str): The checkpoint.
+            mmap (bool): Map the Q-table read-only instead of reading it, so processes loading the same file share
+                one copy in the page cache.
+            verify (bool): Check the SHA-256 of the Q-table. This reads every page once.
+
+        Returns:
+            tuple: The Q-table (a read-only np.memmap if mmap is set) and the header.
+    """
+    header = read_header(filename)
+    dtype = np.dtype(header["dtype"])
+    shape = tuple(header["shape"])
+
+    if os.path.getsize(filename) < header["data_offset"] + dtype.itemsize * int(np.prod(shape)):
+        raise CheckpointError(f"{filename} is truncated")
+
+    if mmap:
+        q_table = np.memmap(filename, dtype=dtype, mode="r", offset=header["data_offset"], shape=shape)
+    else:
+        with open(filename, "rb") as f:
+            f.seek(header["data_offset"])
+            q_table = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+    if verify and hashlib.sha256(q_table).hexdigest() != header["sha256"]:
+        raise CheckpointError(f"{filename} failed its checksum")
+    return q_table, header
+
+def convert_pickle(source, destination, **hyperparameters):
+    """
+        Convert an agent.pkl written by QLearningAgent.save_agent into a checkpoint.
+
+        Only convert pickles from trusted sources: loading one can run arbitrary code.
+
+        Args:
+            source (str): The pickle, holding either the dense Q-table or the older (speed, distance) dict.
+            destination (str): The checkpoint to write.
+            **hyperparameters: alpha, gamma and epsilon the agent was trained with, to record in the header.
+    """
+    # Imported here: Agent uses this module to save and load checkpoints
+    from Drone_Env import DroneEnv
+    from Agent import QLearningAgent
+
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"No agent pickle at {source}")
+
+    agent = QLearningAgent(DroneEnv(headless=True), **hyperparameters)
+    agent.load_agent(source)
+    agent.save_agent(destination)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect Q-table checkpoints or convert agent pickles to them.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser("convert", help="Convert an agent.pkl to a checkpoint.")
+    convert.add_argument("source", help="The pickle to convert.")
+    convert.add_argument("destination", nargs="?", help=f"The checkpoint to write. Defaults to the source with {CHECKPOINT_EXTENSION}.")
+    convert.add_argument("--alpha", type=float, help="Learning rate the agent was trained with.")
+    convert.add_argument("--gamma", type=float, help="Discount factor the agent was trained with.")
+    convert.add_argument("--epsilon", type=float, help="Exploration rate the agent was trained with.")
+
+    info = subparsers.add_parser("info", help="Print the header of a checkpoint and verify its checksum.")
+    info.add_argument("checkpoint", help="The checkpoint to inspect.")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(args)
+
+    if args.command == "convert":
+        destination = args.destination or os.path.splitext(args.source)[0] + CHECKPOINT_EXTENSION
+        hyperparameters = {name: getattr(args, name) for name in ("alpha", "gamma", "epsilon") if getattr(args, name) is not None}
+        convert_pickle(args.source, destination, **hyperparameters)
+    else:
+        try:
+            _, header = load_checkpoint(args.checkpoint)
+        except CheckpointError as error:
+            sys.exit(str(error))
+        print(json.dumps(header, indent=4))
@@ -0,0 +1,212 @@
+import sys
+import json
+import time
+import socket
+import argparse
+import numpy as np
+
+from Drone_Env import DroneEnv, DroneConfig, add_config_arguments, config_from_args
+from Agent import QLearningAgent
+from Metrics import MetricsRegistry
+from Training_Metrics import add_logging_arguments, setup_logging
+
+class SpeedController:
+    def __init__(self, q_table, config=None, initial_speed=1):
+        """
+            Turn distance estimates into speed commands with the greedy policy of a trained agent.
+
+            The policy is looked up, not computed: argmax over the actions is taken once here, so each update is a
+            quantization, a table lookup and the speed change, with no NumPy call on the hot path.
+
+            Args:
+                q_table (np.ndarray): The agent's (speed, distance, action) Q-table.
+                config (DroneConfig): State space the agent was trained on. Its max speed, distance resolution and
+                    horizon, within which actions change the speed, are mirrored here.
+                initial_speed (int): Speed at the start of an approach.
+        """
+        self.config = config or DroneConfig()
+        q_table = np.asarray(q_table)
+        if q_table.shape != self.config.q_table_shape:
+            raise ValueError(f"Q-table shape {q_table.shape} does not match the state space {self.config.q_table_shape}")
+        self.lost_bin = self.config.hidden_bin  # DroneEnv reports this bin when the target is out of range
+
+        # Plain nested lists index faster than an ndarray from Python
+        self.policy = q_table.argmax(axis=2).tolist()
+
+        self.max_speed = self.config.max_speed
+        self.control_distance = self.config.horizon_bins
+        self.meters_per_bin = self.config.distance_resolution
+        self.meters_to_bin = self.config.meters_to_bin
+        self.initial_speed = initial_speed
+        self.speed = initial_speed
+
+    def reset(self, speed=None):
+        """Start a new approach"""
+        self.speed = self.initial_speed if speed is None else speed
+
+    def quantize(self, distance):
+        """Map a metric distance, or None while the target is lost, to a distance bin of the agent's state"""
+        if distance is None or distance != distance:
+            return self.lost_bin
+        distance_bin = self.meters_to_bin(distance)
+        if distance_bin < 0:
+            return 0
+        return distance_bin if distance_bin < self.lost_bin else self.lost_bin
+
+    def update(self, distance):
+        """
+            Choose the action for a new distance estimate and apply it to the commanded speed.
+
+            Args:
+                distance (float): Distance to the target in meters, None if the target is lost.
+
+            Returns:
+                tuple: The action (0: Increase, 1: Decrease, 2: Constant) and the new speed command.
+        """
+        distance_bin = self.quantize(distance)
+        action = self.policy[self.speed][distance_bin]
+
+        if distance_bin < self.control_distance:
+            if action == 0:
+                self.speed = min(self.speed + 1, self.max_speed)
+            elif action == 1:
+                self.speed = max(self.speed - 1, 0)
+        return action, self.speed
+
+def simulate(controller, agent=None, episodes=100, noise=0.0, max_steps=200, seed=0):
+    """
+        Close the loop against a headless DroneEnv: the distance fed to the controller comes from the environment,
+        optionally with Gaussian noise standing in for the tracker.
+
+        Args:
+            controller (SpeedController): The controller under test.
+            agent (QLearningAgent): If given, check every noise-free action against agent.choose_action.
+            episodes (int): Number of approaches, each from a random grid position.
+            noise (float): Standard deviation of the distance noise in meters.
+            max_steps (int): Give up on an approach after this many steps.
+            seed (int): Seed of the start positions and noise.
+
+        Returns:
+            dict: Success rate, mean steps, controller latency percentiles and policy mismatches.
+    """
+    rng = np.random.default_rng(seed)
+    env = DroneEnv(headless=True, config=controller.config)
+    env.set_variables()
+    latencies = []
+
+    successes = 0
+    total_steps = 0
+    mismatches = 0
+    for _ in range(episodes):
+        grid_x = int(rng.integers(env.drone_position[0] // env.scale + 1, env.screen_width // env.scale))
+        state = env.reset(target_position=(grid_x * env.scale + env.scale // 2, env.screen_height // 2))
+        controller.reset()
+
+        for step in range(1, max_steps + 1):
+            measured = env.drone_distance * controller.meters_per_bin
+            if noise:
+                measured += rng.normal(0, noise)
+            if env.drone_distance >= controller.lost_bin:
+                measured = None  # Out of sight
+
+            start = time.perf_counter_ns()
+            action, _ = controller.update(measured)
+            latencies.append(time.perf_counter_ns() - start)
+
+            if agent is not None and not noise and action != agent.choose_action(state):
+                mismatches += 1
+
+            state, reward, done, _ = env.step(action)
+            if done:
+                successes += reward >= 0  # Inside the target window, whatever the speed_step bonus
+                break
+        total_steps += step
+
+    latencies = np.array(latencies) / 1000
+    return {
+        "success_rate": successes / episodes,
+        "mean_steps": total_steps / episodes,
+        "p50_us": float(np.percentile(latencies, 50)),
+        "p99_us": float(np.percentile(latencies, 99)),
+        "max_us": float(latencies.max()),
+        "mismatches": mismatches,
+    }
+
+def serve(controller, listen, stream=None, output="-", timeout=0.5):
+    """
+        Read track results published by Tracking_Server over UDP and emit one speed command per result.
+
+        The distance fed to the controller is the locked object's. Other tracked objects are ignored, and no
+        locked object counts as the target being lost.
+
+        Args:
+            controller (SpeedController): The controller.
+            listen (str): "udp://host:port" the tracking server publishes to.
+            stream (str): Only follow results of this stream name, the first stream seen if None.
+            output (str): "-" for stdout or "udp://host:port" to send the commands to.
+            timeout (float): Seconds without results after which the target counts as lost.
+    """
+    host, port = listen[len("udp://"):].rsplit(":", 1)
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind((host, int(port)))
+    receiver.settimeout(timeout)
+
+    sender, address = None, None
+    if output != "-":
+        host, port = output[len("udp://"):].rsplit(":", 1)
+        sender, address = socket.socket(socket.AF_INET, socket.SOCK_DGRAM), (host, int(port))
+
+    metrics = MetricsRegistry()
+    try:
+        while True:
+            try:
+                result = json.loads(receiver.recv(65536))
+            except socket.timeout:
+                result = None
+            if result is not None:
+                stream = stream or result["stream"]
+                if result["stream"] != stream:
+                    continue
+
+            with metrics.time("control"):
+                # Follow the locked target; the others are tracked for display only
+                distance = next((target["distance"] for target in result["objects"] if target.get("locked")), None) if result else None
+                action, speed = controller.update(distance)
+
+            command = json.dumps({"stream": stream, "timestamp": time.time(), "action": int(action), "speed": speed})
+            if sender is not None:
+                sender.sendto(command.encode(), address)
+            else:
+                print(command, flush=True)
+    except KeyboardInterrupt:
+        print(f"Control latency: {metrics.histogram('control').summary()}", file=sys.stderr)
+    finally:
+        receiver.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive the drone's speed from tracked distances with the trained agent's policy.")
+    parser.add_argument("--agent", default="agent.pkl", help="Q-table saved by Agent.py, a pickle or a .qtable checkpoint.")
+    parser.add_argument("--simulate", action="store_true", help="Close the loop against a headless DroneEnv instead of live results.")
+    parser.add_argument("--episodes", type=int, default=1000, help="Simulated approaches.")
+    parser.add_argument("--noise", type=float, default=0.0, help="Standard deviation of the simulated distance noise in meters.")
+    parser.add_argument("--listen", default="udp://127.0.0.1:5700", help="Where Tracking_Server publishes its results (its --output).")
+    parser.add_argument("--stream", help="Stream to follow. Defaults to the first one seen.")
+    parser.add_argument("--output", default="-", help="'-' for stdout or udp://host:port for the speed commands.")
+    add_config_arguments(parser)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(args)
+
+    config = config_from_args(args)
+    agent = QLearningAgent(DroneEnv(headless=True, config=config), epsilon=0.0)
+    agent.load_agent(args.agent, read_only=True)
+    controller = SpeedController(agent.q_table, config)
+
+    if args.simulate:
+        results = simulate(controller, agent, args.episodes, args.noise)
+        print(f"Success rate: {results['success_rate']:.1%}, mean steps: {results['mean_steps']:.1f}")
+        print(f"Control latency p50: {results['p50_us']:.2f} us, p99: {results['p99_us']:.2f} us, max: {results['max_us']:.2f} us")
+        if not args.noise:
+            print(f"Actions differing from QLearningAgent.choose_action: {results['mismatches']}")
+    else:
+        serve(controller, args.listen, args.stream, args.output)
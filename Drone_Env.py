@@ -1,21 +1,154 @@
+import math
+import logging
+import dataclasses
 import numpy as np
 import pygame
 
+logger = logging.getLogger(__name__)
+
+# Added before flooring to bins, so distances a rounding error below a bin edge, e.g. 43 * 0.1 / 0.1, land in that bin
+BIN_EPSILON = 1e-9
+
+@dataclasses.dataclass(frozen=True)
+class DroneConfig:
+    """
+        Geometry and state space of the drone environment. The defaults are the original 1500-pixel world.
+
+        Distances are simulated in whole bins of distance_resolution meters, so pixels only matter for rendering and
+        for target positions given as screen coordinates.
+
+        Attributes:
+            world_length (float): Length of the world in meters.
+            scale (int): Pixels per meter on screen.
+            screen_height (int): Height of the window in pixels.
+            drone_x (float): Position of the drone's centre in meters.
+            drone_length (float): Distance from the drone's centre to its nose in meters.
+            max_speed (int): Highest speed level. Speed levels run from 0 to max_speed.
+            speed_resolution (float): Meters moved per step at speed level 1. Must be a whole number of distance bins.
+            distance_resolution (float): Width of one distance bin in meters.
+            horizon (float): Range in meters within which the target is seen and the drone reacts to actions.
+            target_window (tuple): Distances in meters (low, high) at which the drone has reached the target. Ending
+                closer than low, or overshooting past the target, ends the episode with -10.
+    """
+    world_length: float = 75.0
+    scale: int = 20
+    screen_height: int = 500
+    drone_x: float = 7.5
+    drone_length: float = 0.1
+    max_speed: int = 5
+    speed_resolution: float = 1.0
+    distance_resolution: float = 1.0
+    horizon: float = 30.0
+    target_window: tuple = (0.0, 5.0)
+
+    def __post_init__(self):
+        ratio = self.speed_resolution / self.distance_resolution
+        if ratio < 1 or not math.isclose(ratio, round(ratio)):
+            raise ValueError("speed_resolution must be a whole multiple of distance_resolution")
+
+    @property
+    def num_speeds(self) -> int:
+        return self.max_speed + 1
+
+    @property
+    def horizon_bins(self) -> int:
+        """Number of distance bins within the horizon; the drone reacts below this distance"""
+        return round(self.horizon / self.distance_resolution)
+
+    @property
+    def hidden_bin(self) -> int:
+        """Distance bin reported while the target is beyond the horizon"""
+        return self.horizon_bins + 1
+
+    @property
+    def num_distances(self) -> int:
+        return self.hidden_bin + 1
+
+    @property
+    def speed_bins(self) -> int:
+        """Distance bins covered per step at speed level 1"""
+        return round(self.speed_resolution / self.distance_resolution)
+
+    @property
+    def window_bins(self) -> tuple:
+        """The target window as (low, high) distance bins"""
+        low, high = self.target_window
+        return (math.ceil(low / self.distance_resolution - BIN_EPSILON), self.meters_to_bin(high))
+
+    @property
+    def screen_width(self) -> int:
+        return round(self.world_length * self.scale)
+
+    @property
+    def q_table_shape(self) -> tuple:
+        """(speeds, distances, actions) shape of a Q-table for this state space"""
+        return (self.num_speeds, self.num_distances, 3)
+
+    def meters_to_bin(self, meters: float) -> int:
+        """Distance bin of a gap in meters, without NumPy so it stays cheap on a controller's hot path"""
+        return math.floor(meters / self.distance_resolution + BIN_EPSILON)
+
+    def distance_bins(self, target_x):
+        """
+            Distance bin of a target at an x-position in pixels, as a scalar or for an array of positions.
+
+            Args:
+                target_x (int | np.ndarray): Target x-position(s) in pixels.
+
+            Returns:
+                int | np.ndarray: The gap between the drone's nose and the target in whole bins.
+        """
+        gap = np.abs(np.asarray(target_x) / self.scale - (self.drone_x + self.drone_length))
+        bins = np.floor(gap / self.distance_resolution + BIN_EPSILON).astype(np.int64)
+        return int(bins) if bins.ndim == 0 else bins
+
+def add_config_arguments(parser) -> None:
+    """Add the DroneConfig options to an argparse parser"""
+    defaults = DroneConfig()
+    parser.add_argument("--world-length", type=float, default=defaults.world_length, help="Length of the world in meters.")
+    parser.add_argument("--max-speed", type=int, default=defaults.max_speed, help="Highest speed level.")
+    parser.add_argument("--speed-resolution", type=float, default=defaults.speed_resolution, help="Meters per step at speed level 1.")
+    parser.add_argument("--distance-resolution", type=float, default=defaults.distance_resolution, help="Width of a distance bin in meters.")
+    parser.add_argument("--horizon", type=float, default=defaults.horizon, help="Range in meters within which the drone reacts.")
+    parser.add_argument("--target-window", type=float, nargs=2, default=defaults.target_window, metavar=("LOW", "HIGH"), help="Goal distances in meters.")
+    parser.add_argument("--scale", type=int, default=defaults.scale, help="Pixels per meter on screen.")
+
+def config_from_args(args) -> DroneConfig:
+    """Build a DroneConfig from add_config_arguments options"""
+    return DroneConfig(world_length=args.world_length, scale=args.scale, max_speed=args.max_speed,
+                       speed_resolution=args.speed_resolution, distance_resolution=args.distance_resolution,
+                       horizon=args.horizon, target_window=tuple(args.target_window))
+
 class DroneEnv():
-    def __init__(self) -> None:
+    def __init__(self, headless: bool = False, config: DroneConfig | None = None) -> None:
         """
             Initialize the drone environment.
+
+            Args:
+                headless (bool): Run without a display. No window or surface is created and render() is a no-op.
+                config (DroneConfig): Geometry and state space. Defaults to the original 1500-pixel world.
         """
 
-        self.screen_width = 1500
-        self.screen_height = 500
-        self.scale = 20 # Each meter is 20 pixels, 2 boxes = 1 meter, if change_scale = 10
+        self.headless = headless
+        self.config = config or DroneConfig()
+
+        self.screen_width = self.config.screen_width
+        self.screen_height = self.config.screen_height
+        self.scale = self.config.scale # Each meter is 20 pixels, 2 boxes = 1 meter, if change_scale = 10
 
-        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
-        pygame.display.set_caption("Drone Environment")
+        if self.headless:
+            self.screen = None
+        else:
+            self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
+            pygame.display.set_caption("Drone Environment")
         
         self.clock = pygame.time.Clock()
 
+        # Cached by the first render()
+        self.background = None
+        self.grid_surface = None
+        self.previous_rects = None
+
         self.drone_dimension = 2
         self.target_dimension = 2
         self.line_thickness = 2
@@ -35,36 +168,57 @@ class DroneEnv():
                 target_position (tuple): The position of the target.
         """
         
-        self.drone_position = (self.screen_width // 10, self.screen_height // 2)
-        
-        if target_position is not None:
-            self.target_position = target_position
-        else:
-            self.target_position = (self.screen_width + 1, self.screen_height // 2)
+        self.drone_position = (round(self.config.drone_x * self.scale), self.screen_height // 2)
 
-        self.distance_5_meter_position = (self.target_position[0] - (5 * self.scale), self.target_position[0] - (5 * self.scale))
-        self.distance_7_meter_position = (self.target_position[0] - (7 * self.scale), self.target_position[0] - (7 * self.scale))
-        self.distance_30_meter_position = (self.drone_position[0] + (30 * self.scale), self.drone_position[0] + (30 * self.scale))
+        self.max_speed = self.config.max_speed
+        self.max_distance = self.config.horizon_bins
+        self.target_distance_range = self.config.window_bins
 
-        self.drone_speed = 1
-        self.max_speed = 5
-        
-        self.drone_distance = abs(self.target_position[0] - (self.drone_position[0] + self.drone_dimension)) // self.scale
-        self.max_distance = 30
+        self.reset(target_position)
 
-        self.target_distance_range = (0, 5)
-        self.speed_step = 1
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Drone position: %s, Target position: %s, Drone Distance: %s",
+                         self.drone_position[0], self.target_position[0], self.drone_distance)
+
+    def grid_positions(self) -> np.ndarray:
+        """
+            Returns:
+                np.ndarray: The x-position (in pixels) of the centre of every grid cell, where targets are placed.
+        """
 
-        print(f"Drone position: {self.drone_position[0]}")
-        print(f"Target position: {self.target_position[0]}")
-        print(f"Drone Distance: {self.drone_distance}")
+        return np.arange(0, self.screen_width, self.scale) + self.scale // 2
 
-        self.state = np.array([self.drone_speed, self.drone_distance if self.drone_distance < 31 else 31])
+    def snap_to_grid(self, x: int) -> int:
+        """
+            Round an x-position in pixels, e.g. a mouse click, to the nearest grid position.
+
+            Args:
+                x (int): The x-position in pixels.
+
+            Returns:
+                int: The centre of the grid cell whose left edge is nearest to x.
+        """
+
+        edges = self.grid_positions() - self.scale // 2
+        return int(edges[np.abs(edges - x).argmin()]) + self.scale // 2
+
+    def observe(self) -> np.array:
+        """
+            Returns:
+                np.array: The (drone_speed, drone_distance) state, with the distance capped at the hidden bin. An
+                    overshot target, which ends the episode, is reported at distance 0.
+        """
+
+        hidden_bin = self.config.hidden_bin
+        return np.array([self.drone_speed, min(max(self.drone_distance, 0), hidden_bin)])
 
     def reset(self, target_position: tuple | None = None) -> np.array:
         """
             Reset the environment to the initial state.
 
+            Args:
+                target_position (tuple): The target position in pixels. Defaults to just off the right edge.
+
             Returns:
                 np.array: The initial state of the environment.
         """
@@ -72,19 +226,15 @@ class DroneEnv():
         self.drone_speed = 1
         self.speed_step = 1
 
-        if target_position is not None:
-            self.target_position = target_position
-        else:
-            self.target_position = (self.screen_width + 1, self.screen_height // 2)
+        if target_position is None:
+            target_position = (self.screen_width + 1, self.screen_height // 2)
 
-        self.drone_distance = abs(self.target_position[0] - (self.drone_position[0] + self.drone_dimension)) // self.scale
+        # Only rendering uses the pixel position; the simulation runs on distance bins
+        self.target_position = target_position
+        self.drone_distance = self.config.distance_bins(target_position[0])
 
-        self.distance_5_meter_position = (self.target_position[0] - (5 * self.scale), self.target_position[0] - (5 * self.scale))
-        self.distance_7_meter_position = (self.target_position[0] - (7 * self.scale), self.target_position[0] - (7 * self.scale))
-        self.distance_30_meter_position = (self.drone_position[0] + (30 * self.scale), self.drone_position[0] + (30 * self.scale))
-        
-        self.state = np.array([self.drone_speed, self.drone_distance if self.drone_distance < 31 else 31])  # Reset to initial speed and max distance
-        
+        self.state = self.observe()  # Reset to initial speed and max distance
+        self.previous_rects = None  # Redraw the whole screen on the next render
         return self.state
     
     def step(self, action: int) -> tuple:
@@ -100,7 +250,7 @@ class DroneEnv():
 
         done = False
 
-        if self.target_position[0] <= self.distance_30_meter_position[0]:
+        if self.drone_distance < self.max_distance:
             if action == 0:
                 self.drone_speed = min(self.drone_speed + 1, self.max_speed)
                 self.speed_step += 1
@@ -112,56 +262,101 @@ class DroneEnv():
             elif action == 2:
                 self.speed_step += 1
         
-        if self.drone_distance < 31:
-            self.drone_distance -= self.drone_speed
-        else:
-            self.drone_distance -= 1
+        # Beyond the horizon the speed is still 1, so this also covers the target approaching one bin per step
+        self.drone_distance -= self.drone_speed * self.config.speed_bins
         
-        self.target_position = (self.target_position[0] - self.drone_speed * self.scale, self.target_position[1])
-        self.state = np.array([self.drone_speed, self.drone_distance if self.drone_distance < 31 else 31])
+        self.target_position = (self.target_position[0] - round(self.drone_speed * self.config.speed_resolution * self.scale), self.target_position[1])
+        self.state = self.observe()
 
         if self.target_distance_range[0] <= self.drone_distance <= self.target_distance_range[1]:
             reward = 10 // self.speed_step
             done = True
         
-        elif 0 <= self.drone_distance < self.target_distance_range[1]:
+        elif self.drone_distance < self.target_distance_range[1]:
+            # Too close, or past the target when a step is wider than the window
             reward = -10
             done = True
         
         else:
             reward = -1
 
-        print(f"Drone position: {self.drone_position[0]}")
-        print(f"Target position: {self.target_position[0]}")
-        print(f"Drone Distance: {self.drone_distance}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Drone position: %s, Target position: %s, Drone Distance: %s",
+                         self.drone_position[0], self.target_position[0], self.drone_distance)
 
         return self.state, reward, done, {}
 
-    def render(self) -> None:
+    def _build_background(self) -> None:
         """
-            Render the environment to the screen.
+            Pre-render the static grid once.
 
-            Args:
-                target_position (tuple): The position of the target.
+            The grid is kept twice: on a white background that is blitted to erase moving objects, and as an
+            overlay with white as colorkey that puts the grid lines back on top of the boxes, as they were always drawn.
         """
 
-        self.screen.fill((255, 255, 255))
-
-        pygame.draw.rect(self.screen, self.green, (self.drone_position[0] - self.drone_dimension * 10, self.drone_position[1] - self.drone_dimension * 4, self.drone_dimension * self.scale, self.drone_dimension * self.scale))
-        pygame.draw.rect(self.screen, self.red, (self.target_position[0] - self.target_dimension * 10, self.target_position[1] - self.target_dimension * 4, self.target_dimension * self.scale, self.target_dimension * self.scale))
-
         change_scale = 10
 
+        self.grid_surface = pygame.Surface((self.screen_width, self.screen_height)).convert()
+        self.grid_surface.fill((255, 255, 255))
+
         # Draw Grid
         for i in range(int(self.screen_height // change_scale)):
-            pygame.draw.line(self.screen, self.black, (0, i * change_scale), (self.screen_width, i * change_scale), self.line_thickness)
+            pygame.draw.line(self.grid_surface, self.black, (0, i * change_scale), (self.screen_width, i * change_scale), self.line_thickness)
         
         for i in range(int(self.screen_width // change_scale)):
-            pygame.draw.line(self.screen, self.black, (i * change_scale, 0), (i * change_scale, self.screen_height), self.line_thickness)
+            pygame.draw.line(self.grid_surface, self.black, (i * change_scale, 0), (i * change_scale, self.screen_height), self.line_thickness)
+
+        self.background = self.grid_surface.copy()
+        self.grid_surface.set_colorkey((255, 255, 255))
+
+    def _marker_rect(self, x: int) -> pygame.Rect:
+        """Area covered by a double marker line at x"""
+        width = self.line_thickness * 2
+        return pygame.Rect(x - width, 0, 2 + 2 * width + 1, self.screen_height)
+
+    def render(self) -> list:
+        """
+            Render the environment and update the changed parts of the display. Does nothing in headless mode.
+
+            Only the areas the drone, the target and the marker lines covered in the previous frame and cover now
+            are redrawn and pushed to the display, on top of a cached background. Callers no longer need to flip the display.
+
+            Returns:
+                list: The rectangles updated on the display.
+        """
+
+        if self.headless:
+            return []
+
+        if self.background is None:
+            self._build_background()
 
-        self.distance_5_meter_position = (self.target_position[0] - (5 * self.scale), self.target_position[0] - (5 * self.scale))
+        window_position = round(self.target_position[0] - self.config.target_window[1] * self.scale)
+        horizon_position = round(self.drone_position[0] + self.config.horizon * self.scale)
+        self.distance_5_meter_position = (window_position, window_position)
         self.distance_7_meter_position = (self.target_position[0] - (7 * self.scale), self.target_position[0] - (7 * self.scale))
-        self.distance_30_meter_position = (self.drone_position[0] + (30 * self.scale), self.drone_position[0] + (30 * self.scale))
+        self.distance_30_meter_position = (horizon_position, horizon_position)
+
+        drone_rect = pygame.Rect(self.drone_position[0] - self.drone_dimension * 10, self.drone_position[1] - self.drone_dimension * 4, self.drone_dimension * self.scale, self.drone_dimension * self.scale)
+        target_rect = pygame.Rect(self.target_position[0] - self.target_dimension * 10, self.target_position[1] - self.target_dimension * 4, self.target_dimension * self.scale, self.target_dimension * self.scale)
+        screen_rect = self.screen.get_rect()
+        rects = [rect.clip(screen_rect) for rect in (drone_rect, target_rect, self._marker_rect(window_position),
+                                                     self._marker_rect(self.distance_7_meter_position[0]),
+                                                     self._marker_rect(horizon_position))]
+
+        # Erase the previous frame's moving objects, or everything after a reset
+        if self.previous_rects is None:
+            self.screen.blit(self.background, (0, 0))
+            dirty = [screen_rect]
+        else:
+            for rect in self.previous_rects:
+                self.screen.blit(self.background, rect, rect)
+            dirty = self.previous_rects + rects
+
+        pygame.draw.rect(self.screen, self.green, drone_rect)
+        pygame.draw.rect(self.screen, self.red, target_rect)
+        for rect in rects[:2]:
+            self.screen.blit(self.grid_surface, rect, rect)
 
         # 5 meter Distance from object
         pygame.draw.line(self.screen, self.blue, (self.distance_5_meter_position[0], 0), (self.distance_5_meter_position[1], self.screen_height), self.line_thickness * 2)
@@ -175,13 +370,16 @@ class DroneEnv():
         pygame.draw.line(self.screen, self.yellow, (self.distance_30_meter_position[0], 0), (self.distance_30_meter_position[1], self.screen_height), self.line_thickness * 2)
         pygame.draw.line(self.screen, self.yellow, (self.distance_30_meter_position[0] + 2, 0), (self.distance_30_meter_position[1] + 2, self.screen_height), self.line_thickness * 2)
 
+        self.previous_rects = rects
+        pygame.display.update(dirty)
+        return dirty
+
 if __name__ == "__main__":
     env = DroneEnv()
 
     env.set_variables(target_position=(5 * env.screen_width // 6, env.screen_height // 2))
     while True:
         env.render()
-        pygame.display.flip()
         
         env.clock.tick(60)
         for event in pygame.event.get():
@@ -0,0 +1,133 @@
+import os
+import json
+import argparse
+import numpy as np
+
+from Drone_Env import DroneEnv, add_config_arguments, config_from_args
+from Vector_Drone_Env import VectorDroneEnv
+from Agent import QLearningAgent
+from Planner import plan_q_table
+from Training_Metrics import add_logging_arguments, setup_logging
+
+def random_start_positions(env: DroneEnv, size: int, seed: int = 0) -> np.ndarray:
+    """
+        Returns:
+            np.ndarray: size target x-positions (in pixels) drawn uniformly over the screen, not snapped to the grid.
+    """
+
+    return np.random.default_rng(seed).integers(0, env.screen_width, size=size)
+
+def evaluate_agent(agent: QLearningAgent, target_positions: np.ndarray, max_steps: int = 200) -> dict:
+    """
+        Run the agent's greedy policy from every target position at once in a VectorDroneEnv.
+
+        An episode ends when the target window is reached, when the drone ends too close or overshoots the target,
+        or after max_steps, e.g. when the policy stalls at speed 0. Only endings inside the window count as a
+        success, the same definition Planner.evaluate_policy and Controller.simulate use.
+
+        Args:
+            agent (QLearningAgent): The agent. Its epsilon is ignored.
+            target_positions (np.ndarray): Target x-positions in pixels, one episode each.
+            max_steps (int): Step limit of an episode.
+
+        Returns:
+            dict: Episode count, success, too close, overshoot and timeout rates, mean steps and mean reward.
+    """
+
+    num_episodes = len(target_positions)
+    env = VectorDroneEnv(num_episodes, target_positions=target_positions, autoreset=False, config=agent.env.config)
+    states = env.get_state()
+
+    epsilon, agent.epsilon = agent.epsilon, 0.0
+    rewards = np.zeros(num_episodes)
+    steps = np.zeros(num_episodes, dtype=np.int64)
+    success = np.zeros(num_episodes, dtype=bool)
+    too_close = np.zeros(num_episodes, dtype=bool)
+    overshoot = np.zeros(num_episodes, dtype=bool)
+    running = np.ones(num_episodes, dtype=bool)
+
+    for _ in range(max_steps):
+        states, step_rewards, dones, _ = env.step(agent.choose_action(states))
+
+        rewards += np.where(running, step_rewards, 0)
+        steps += running
+        success |= running & dones & (step_rewards >= 0)
+        overshoot |= running & dones & (env.drone_distance < 0)
+        too_close |= running & dones & (step_rewards < 0) & (env.drone_distance >= 0)
+        running &= ~dones
+        if not running.any():
+            break
+
+    agent.epsilon = epsilon
+    return {
+        "episodes": num_episodes,
+        "success_rate": float(success.mean()),
+        "too_close_rate": float(too_close.mean()),
+        "overshoot_rate": float(overshoot.mean()),
+        "timeout_rate": float(running.mean()),
+        "mean_steps": float(steps.mean()),
+        "mean_reward": float(rewards.mean()),
+    }
+
+def evaluate_sets(agent: QLearningAgent, random_sets: int = 5, random_size: int = 1000, seed: int = 0, max_steps: int = 200) -> dict:
+    """
+        Evaluate over every grid-aligned start position, as placed by a click in test_agent.py, and over
+        random_sets sets of unsnapped random positions.
+
+        Returns:
+            dict: Results of evaluate_agent keyed by set name.
+    """
+
+    results = {"grid": evaluate_agent(agent, agent.env.grid_positions(), max_steps)}
+    for i in range(random_sets):
+        results[f"random-{seed + i}"] = evaluate_agent(agent, random_start_positions(agent.env, random_size, seed + i), max_steps)
+    return results
+
+def print_results(results: dict) -> None:
+    """Print one line per evaluation set"""
+    print(f"{'set':<16}{'episodes':>9}{'success':>9}{'too close':>11}{'overshoot':>11}{'timeout':>9}{'steps':>8}{'reward':>9}")
+    for name, result in results.items():
+        print(f"{name:<16}{result['episodes']:>9}{result['success_rate']:>9.1%}{result['too_close_rate']:>11.1%}{result['overshoot_rate']:>11.1%}"
+              f"{result['timeout_rate']:>9.1%}{result['mean_steps']:>8.1f}{result['mean_reward']:>9.2f}")
+
+def add_evaluation_arguments(parser) -> None:
+    """Add the evaluation options to an argparse parser"""
+    parser.add_argument("--agent", default="agent.pkl", help="Q-table saved by Agent.py, a pickle or a .qtable checkpoint.")
+    parser.add_argument("--random-sets", type=int, default=5, help="Number of random start position sets.")
+    parser.add_argument("--random-size", type=int, default=1000, help="Start positions per random set.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first random set.")
+    parser.add_argument("--max-steps", type=int, default=200, help="Step limit of an episode.")
+    parser.add_argument("--planner", action="store_true", help="Also evaluate the exact planner's policy as a reference.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+def main(args) -> None:
+    # load_agent falls back to an all-zero table, which would be evaluated as if it had been trained
+    if not os.path.exists(args.agent):
+        raise SystemExit(f"Agent file {args.agent} not found")
+
+    env = DroneEnv(headless=True, config=config_from_args(args))
+    agent = QLearningAgent(env)
+    agent.load_agent(args.agent, read_only=True)
+
+    results = {"agent": evaluate_sets(agent, args.random_sets, args.random_size, args.seed, args.max_steps)}
+    if args.planner:
+        reference = QLearningAgent(DroneEnv(headless=True, config=env.config), gamma=agent.gamma)
+        reference.q_table = plan_q_table(env.config, agent.gamma)
+        results["planner"] = evaluate_sets(reference, args.random_sets, args.random_size, args.seed, args.max_steps)
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+
+    for name, sets in results.items():
+        print(f"{name.capitalize()} policy:")
+        print_results(sets)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate a trained agent greedily over many start positions, headless.")
+    add_evaluation_arguments(parser)
+    add_config_arguments(parser)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(args)
+    main(args)
@@ -0,0 +1,244 @@
+import os
+import time
+import cv2
+import numpy as np
+
+try:
+    import gi
+    gi.require_version('Gst', '1.0')
+    from gi.repository import Gst
+except (ImportError, ValueError):
+    # Offline sources (video files, image directories, synthetic frames) work without GStreamer
+    Gst = None
+
+# Bytes per pixel of the packed raw video formats the appsink may be negotiated to
+FORMAT_CHANNELS = {"RGB": 3, "BGR": 3, "RGBA": 4, "BGRA": 4, "RGBx": 4, "BGRx": 4, "GRAY8": 1}
+
+class Frame:
+    def __init__(self, image, pts=None, release=None, ground_truth=None):
+        """
+            A video frame that may be a read-only view into memory owned by someone else.
+
+            Args:
+                image (np.ndarray): The frame pixels.
+                pts (int): Presentation timestamp in nanoseconds, if known.
+                release (callable): Called once when the frame is no longer needed, e.g. to unmap a GstBuffer.
+                ground_truth (tuple): The true (x, y, w, h) of the target, if the source knows it.
+        """
+        self.image = image
+        self.pts = pts
+        self.ground_truth = ground_truth
+        self._release = release
+
+    def writable(self):
+        """Return a writable image, copying the pixels only if the current image is a read-only view"""
+        if not self.image.flags.writeable:
+            self.image = self.image.copy()
+            self.release()
+        return self.image
+
+    def release(self):
+        """Give the underlying memory back. The image must not be used afterwards unless writable() copied it"""
+        if self._release is not None:
+            self._release()
+            self._release = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+class FrameSource:
+    """Base class of everything that produces Frames. Subclasses implement pull()"""
+
+    def pull(self):
+        """Return the next Frame, or None when the source is exhausted"""
+        raise NotImplementedError
+
+    def close(self):
+        """Free the resources held by the source"""
+
+    def __iter__(self):
+        while True:
+            frame = self.pull()
+            if frame is None:
+                return
+            yield frame
+
+class AppSinkFrameSource(FrameSource):
+    def __init__(self, appsink):
+        """
+            Pull frames from a GStreamer appsink without copying them.
+
+            Each buffer is mapped read-only and wrapped as a NumPy view. The frame geometry is parsed from the caps
+            only when the caps change.
+
+            Args:
+                appsink (Gst.Element): The appsink to pull samples from.
+        """
+        self.appsink = appsink
+        self._caps = None
+        self._shape = None
+        self._strides = None
+
+    def _update_geometry(self, caps):
+        """Parse width, height, format and row stride from new caps"""
+        structure = caps.get_structure(0)
+        width = structure.get_value('width')
+        height = structure.get_value('height')
+        channels = FORMAT_CHANNELS[structure.get_value('format')]
+
+        # GStreamer pads the rows of packed raw video to a multiple of 4 bytes
+        stride = (width * channels + 3) & ~3
+
+        self._caps = caps
+        self._shape = (height, width, channels) if channels > 1 else (height, width)
+        self._strides = (stride, channels, 1) if channels > 1 else (stride, 1)
+
+    def pull(self):
+        """
+            Pull the next frame.
+
+            Returns:
+                Frame: A read-only view of the mapped buffer, or None at end of stream. Release it (or use it as a
+                    context manager) once done with it so the buffer can be unmapped.
+        """
+        sample = self.appsink.emit("pull-sample")
+        if sample is None:
+            return None
+
+        caps = sample.get_caps()
+        if self._caps is None or not caps.is_equal(self._caps):
+            self._update_geometry(caps)
+
+        buffer = sample.get_buffer()
+        success, map_info = buffer.map(Gst.MapFlags.READ)
+        if not success:
+            raise RuntimeError("Could not map GstBuffer for reading")
+
+        image = np.ndarray(self._shape, dtype=np.uint8, buffer=map_info.data, strides=self._strides)
+        image.flags.writeable = False
+
+        pts = buffer.pts if buffer.pts != Gst.CLOCK_TIME_NONE else None
+        return Frame(image, pts=pts, release=lambda: buffer.unmap(map_info))
+
+class GstLaunchFrameSource(AppSinkFrameSource):
+    def __init__(self, description):
+        """
+            Run a gst-launch style pipeline ending in "appsink name=mysink" and pull frames from it.
+
+            Args:
+                description (str): The pipeline, e.g. "filesrc location=clip.mp4 ! decodebin ! videoconvert !
+                    video/x-raw,format=RGB ! appsink name=mysink sync=false" or a videotestsrc pipeline.
+        """
+        if Gst is None:
+            raise RuntimeError("GStreamer (PyGObject) is not available")
+
+        Gst.init(None)
+        self.pipeline = Gst.parse_launch(description)
+        super().__init__(self.pipeline.get_by_name("mysink"))
+        self.pipeline.set_state(Gst.State.PLAYING)
+
+    def close(self):
+        self.pipeline.set_state(Gst.State.NULL)
+
+class VideoFileFrameSource(FrameSource):
+    def __init__(self, path):
+        """
+            Read frames from a local video file with OpenCV.
+
+            Args:
+                path (str): The video file.
+        """
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise FileNotFoundError(f"Could not open video {path}")
+
+    def pull(self):
+        success, image = self.capture.read()
+        if not success:
+            return None
+        return Frame(image, pts=int(self.capture.get(cv2.CAP_PROP_POS_MSEC) * 1e6))
+
+    def close(self):
+        self.capture.release()
+
+class ImageDirectoryFrameSource(FrameSource):
+    def __init__(self, directory, extensions=(".png", ".jpg", ".jpeg", ".bmp")):
+        """
+            Read the images of a directory in file name order.
+
+            Args:
+                directory (str): The directory holding the frames.
+                extensions (tuple): File extensions that count as frames.
+        """
+        self.paths = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                            if name.lower().endswith(extensions))
+        self.index = 0
+
+    def pull(self):
+        if self.index >= len(self.paths):
+            return None
+
+        image = cv2.imread(self.paths[self.index])
+        if image is None:
+            raise ValueError(f"Could not read image {self.paths[self.index]}")
+
+        self.index += 1
+        return Frame(image)
+
+class SyntheticFrameSource(FrameSource):
+    def __init__(self, num_frames=300, width=1280, height=720, box_size=50, speed=(7, 4), seed=0, framerate=None):
+        """
+            Generate a textured box bouncing over a noisy background, with exact ground truth.
+
+            Args:
+                num_frames (int): Number of frames to generate.
+                width (int): Frame width.
+                height (int): Frame height.
+                box_size (int): Side of the square target.
+                speed (tuple): Target motion in pixels per frame along x and y.
+                seed (int): Seed for the textures.
+                framerate (float): Deliver frames at this rate like a live camera, as fast as possible if None.
+        """
+        rng = np.random.default_rng(seed)
+
+        self.num_frames = num_frames
+        self.background = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+        self.background = cv2.GaussianBlur(self.background, (0, 0), 3)
+        self.target = rng.integers(0, 256, size=(box_size, box_size, 3), dtype=np.uint8)
+
+        self.box_size = box_size
+        self.position = np.array([width // 4, height // 4])
+        self.velocity = np.array(speed)
+        self.limit = np.array([width - box_size, height - box_size])
+        self.index = 0
+        self.frame_interval = 1 / framerate if framerate else None
+        self._next_frame_at = None
+
+    def pull(self):
+        if self.index >= self.num_frames:
+            return None
+
+        if self.frame_interval is not None:
+            now = time.monotonic()
+            if self._next_frame_at is None:
+                self._next_frame_at = now
+            elif self._next_frame_at > now:
+                time.sleep(self._next_frame_at - now)
+            self._next_frame_at += self.frame_interval
+
+        x, y = self.position
+        image = self.background.copy()
+        image[y:y + self.box_size, x:x + self.box_size] = self.target
+        frame = Frame(image, ground_truth=(int(x), int(y), self.box_size, self.box_size))
+
+        # Bounce off the frame borders
+        self.position = self.position + self.velocity
+        bounced = (self.position < 0) | (self.position > self.limit)
+        self.velocity = np.where(bounced, -self.velocity, self.velocity)
+        self.position = np.clip(self.position, 0, self.limit)
+
+        self.index += 1
+        return frame
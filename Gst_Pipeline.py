@@ -0,0 +1,119 @@
+import argparse
+import dataclasses
+
+# RTP encoding name, depayloader and libav decoder for each supported codec
+CODECS = {
+    "h264": ("H264", "rtph264depay", "avdec_h264"),
+    "h265": ("H265", "rtph265depay", "avdec_h265"),
+}
+
+# Low-latency software encoder and RTP payloader for each codec, used by the loopback sender
+SENDER_ENCODERS = {
+    "h264": ("x264enc tune=zerolatency speed-preset=ultrafast key-int-max=30", "rtph264pay config-interval=1"),
+    "h265": ("x265enc tune=zerolatency speed-preset=ultrafast key-int-max=30", "rtph265pay config-interval=1"),
+}
+
+@dataclasses.dataclass
+class PipelineConfig:
+    """
+        Settings of the receiving GStreamer pipeline.
+
+        Attributes:
+            port (int): UDP port the RTP stream arrives on.
+            codec (str): Key of CODECS.
+            payload (int): RTP payload type.
+            udp_buffer_size (int): Kernel receive buffer for udpsrc in bytes, None for the default.
+            jitterbuffer_latency (int): Insert an rtpjitterbuffer with this latency in ms, None for no jitterbuffer.
+            decoder_threads (int): max-threads of the decoder, 0 lets libav decide. 1 avoids frame threading latency.
+            output_format (str): Raw format handed to Python, e.g. "RGB", "BGR" or "GRAY8".
+            width (int): Scale to this width inside GStreamer with videoscale, None keeps the stream's size.
+            height (int): Scale to this height, None keeps the stream's size.
+            max_buffers (int): appsink max-buffers, 0 for unlimited.
+            drop (bool): Let appsink drop old buffers when max_buffers is reached instead of blocking upstream.
+            sync (bool): Let appsink wait for each buffer's presentation time.
+    """
+    port: int = 5600
+    codec: str = "h264"
+    payload: int = 96
+    udp_buffer_size: int | None = None
+    jitterbuffer_latency: int | None = None
+    decoder_threads: int | None = None
+    output_format: str = "RGB"
+    width: int | None = None
+    height: int | None = None
+    max_buffers: int | None = None
+    drop: bool | None = None
+    sync: bool | None = None
+
+# Named settings. "default" is the pipeline test1.py always used.
+PRESETS = {
+    "default": PipelineConfig(),
+    "low-latency": PipelineConfig(jitterbuffer_latency=20, decoder_threads=1, max_buffers=1, drop=True, sync=False),
+    "low-latency-gray": PipelineConfig(jitterbuffer_latency=20, decoder_threads=1, max_buffers=1, drop=True, sync=False,
+                                       output_format="GRAY8", width=640, height=360),
+    "max-throughput": PipelineConfig(udp_buffer_size=4 * 1024 * 1024, decoder_threads=0, max_buffers=8, drop=False, sync=False),
+}
+
+def build_pipeline_description(config):
+    """Return the gst-launch description of the receiving pipeline for a PipelineConfig"""
+    if config.codec not in CODECS:
+        raise ValueError(f"Unknown codec {config.codec!r}, expected one of {sorted(CODECS)}")
+    encoding_name, depayloader, decoder = CODECS[config.codec]
+
+    source = f"udpsrc port={config.port}"
+    if config.udp_buffer_size is not None:
+        source += f" buffer-size={config.udp_buffer_size}"
+
+    elements = [source, f"application/x-rtp, payload={config.payload}"]
+    if config.jitterbuffer_latency is not None:
+        elements[1] = f"application/x-rtp, media=video, clock-rate=90000, encoding-name={encoding_name}, payload={config.payload}"
+        elements.append(f"rtpjitterbuffer latency={config.jitterbuffer_latency} drop-on-latency=true")
+    elements.append(depayloader)
+    if config.decoder_threads is not None:
+        elements.append(f"{decoder} name=decoder max-threads={config.decoder_threads}")
+    else:
+        elements.append(f"{decoder} name=decoder")
+    elements.append("videoconvert")
+
+    raw_caps = f"video/x-raw,format={config.output_format}"
+    if config.width is not None and config.height is not None:
+        elements.append("videoscale")
+        raw_caps += f",width={config.width},height={config.height}"
+    elements.append(raw_caps)
+
+    sink = "appsink name=mysink"
+    if config.max_buffers is not None:
+        sink += f" max-buffers={config.max_buffers}"
+    if config.drop is not None:
+        sink += f" drop={str(config.drop).lower()}"
+    if config.sync is not None:
+        sink += f" sync={str(config.sync).lower()}"
+    elements.append(sink)
+
+    return " ! ".join(elements)
+
+def add_pipeline_arguments(parser):
+    """Add the pipeline preset and override options to an argparse parser"""
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="default", help="Named pipeline settings.")
+    parser.add_argument("--port", type=int, help="UDP port of the RTP stream.")
+    parser.add_argument("--codec", choices=sorted(CODECS), help="Video codec of the stream.")
+    parser.add_argument("--decoder-threads", type=int, help="Decoder max-threads (0 = automatic).")
+    parser.add_argument("--format", dest="output_format", help="Raw output format, e.g. RGB, BGR or GRAY8.")
+    parser.add_argument("--width", type=int, help="Scale frames to this width inside GStreamer.")
+    parser.add_argument("--height", type=int, help="Scale frames to this height inside GStreamer.")
+    parser.add_argument("--jitterbuffer-latency", type=int, help="Add an rtpjitterbuffer with this latency (ms).")
+    parser.add_argument("--max-buffers", type=int, help="appsink max-buffers (0 = unlimited).")
+    parser.add_argument("--drop", action=argparse.BooleanOptionalAction, help="Let appsink drop old buffers when full.")
+    parser.add_argument("--sync", action=argparse.BooleanOptionalAction, help="Let appsink sync on buffer timestamps.")
+
+def config_from_args(args):
+    """Build a PipelineConfig from the preset and the overrides given on the command line"""
+    overrides = {field.name: getattr(args, field.name) for field in dataclasses.fields(PipelineConfig)
+                 if getattr(args, field.name, None) is not None}
+    return dataclasses.replace(PRESETS[args.preset], **overrides)
+
+def build_sender_description(port=5600, codec="h264", payload=96, width=1280, height=720, framerate=30, host="127.0.0.1"):
+    """Return a videotestsrc -> encoder -> udpsink description that stands in for the drone's camera"""
+    encoder, payloader = SENDER_ENCODERS[codec]
+    return (f"videotestsrc is-live=true pattern=ball ! video/x-raw,width={width},height={height},framerate={framerate}/1 ! "
+            f"{encoder} ! {payloader} pt={payload} name=payloader ! udpsink host={host} port={port}")
@@ -0,0 +1,290 @@
+import sys
+import json
+import time
+import bisect
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+try:
+    import gi
+    gi.require_version('Gst', '1.0')
+    from gi.repository import Gst
+except (ImportError, ValueError):
+    Gst = None
+
+# Histogram bucket upper bounds in seconds: 10 us to 10 s, about 26% apart
+BUCKET_BOUNDS = tuple(float(b) for b in np.geomspace(1e-5, 10.0, 61))
+
+class Histogram:
+    def __init__(self, window=60.0):
+        """
+            Latency histogram with fixed log-spaced buckets.
+
+            Keeps all-time counts for export and a rolling view over the last one to two windows for percentiles.
+            Recording a value is a bisect and a few integer increments.
+
+            Args:
+                window (float): Length of the rolling window in seconds.
+        """
+        self.window = window
+        self.total_counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.total_sum = 0.0
+        self.total_count = 0
+
+        self._current = [0] * (len(BUCKET_BOUNDS) + 1)
+        self._previous = [0] * (len(BUCKET_BOUNDS) + 1)
+        self._window_start = time.monotonic()
+        self._max = 0.0
+        self._previous_max = 0.0
+        self._lock = threading.Lock()
+
+    def _rotate(self, now):
+        """Start a new window once the current one is over. Call with the lock held"""
+        elapsed = now - self._window_start
+        if elapsed < self.window:
+            return
+        if elapsed < 2 * self.window:
+            self._previous, self._previous_max = self._current, self._max
+        else:
+            # Nothing was recorded during the last full window
+            self._previous, self._previous_max = [0] * (len(BUCKET_BOUNDS) + 1), 0.0
+        self._current = [0] * (len(BUCKET_BOUNDS) + 1)
+        self._max = 0.0
+        self._window_start = now
+
+    def observe(self, seconds):
+        """Record one measurement"""
+        index = bisect.bisect_left(BUCKET_BOUNDS, seconds)
+        now = time.monotonic()
+        with self._lock:
+            self._rotate(now)
+            self._current[index] += 1
+            self._max = max(self._max, seconds)
+            self.total_counts[index] += 1
+            self.total_sum += seconds
+            self.total_count += 1
+
+    def summary(self):
+        """Return count, p50, p90, p99 and max of the rolling window, in milliseconds"""
+        with self._lock:
+            self._rotate(time.monotonic())
+            counts = np.add(self._current, self._previous)
+            # The percentiles cover both windows, so the cap must too
+            maximum = max(self._max, self._previous_max)
+
+        count = int(counts.sum())
+        summary = {"count": count}
+        if count:
+            cumulative = np.cumsum(counts)
+            for name, quantile in (("p50_ms", 0.5), ("p90_ms", 0.9), ("p99_ms", 0.99)):
+                # Interpolate linearly inside the bucket holding the quantile
+                rank = quantile * count
+                index = int(np.searchsorted(cumulative, rank))
+                lower = BUCKET_BOUNDS[index - 1] if index > 0 else 0.0
+                upper = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else maximum
+                below = cumulative[index - 1] if index > 0 else 0
+                value = lower + (upper - lower) * (rank - below) / counts[index]
+                summary[name] = round(float(min(value, maximum)) * 1000, 3)
+            summary["max_ms"] = round(maximum * 1000, 3)
+        return summary
+
+class MetricsRegistry:
+    def __init__(self, window=60.0):
+        """
+            Named latency histograms and counters for the video pipeline.
+
+            Args:
+                window (float): Rolling window of the histograms in seconds.
+        """
+        self.window = window
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        """Return the histogram with this name, creating it on first use"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram(self.window))
+        return histogram
+
+    def observe(self, name, seconds):
+        """Record a duration"""
+        self.histogram(name).observe(seconds)
+
+    def increment(self, name, amount=1):
+        """Add to a counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextlib.contextmanager
+    def time(self, name):
+        """Time the body of a with block on the monotonic clock"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        """Return a JSON-serializable view of every histogram and counter"""
+        return {
+            "timestamp": time.time(),
+            "stages": {name: histogram.summary() for name, histogram in list(self.histograms.items())},
+            "counters": dict(self.counters),
+        }
+
+    def prometheus_text(self, prefix="video_pipeline"):
+        """Render all-time histograms and counters in the Prometheus text exposition format"""
+        lines = [f"# TYPE {prefix}_stage_seconds histogram"]
+        for name, histogram in list(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKET_BOUNDS, histogram.total_counts):
+                cumulative += count
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {histogram.total_count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {histogram.total_sum:.9f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {histogram.total_count}')
+
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, value in list(self.counters.items()):
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+class JsonLinesExporter:
+    def __init__(self, registry, path=None, interval=10.0):
+        """
+            Append a registry snapshot as one JSON line every interval seconds, from a daemon thread.
+
+            Args:
+                registry (MetricsRegistry): The metrics to export.
+                path (str): File to append to. Writes to stdout if None.
+                interval (float): Seconds between snapshots.
+        """
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def write(self):
+        """Write one snapshot now"""
+        line = json.dumps(self.registry.snapshot())
+        if self.path is None:
+            print(line, file=sys.stdout, flush=True)
+        else:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def stop(self):
+        """Stop the thread and write a final snapshot"""
+        self._stop.set()
+        self.write()
+
+class PrometheusExporter:
+    def __init__(self, registry, port=9108, host="127.0.0.1"):
+        """
+            Serve the registry on http://host:port/metrics from a daemon thread.
+
+            Args:
+                registry (MetricsRegistry): The metrics to export.
+                port (int): Port to listen on.
+                host (str): Interface to bind, local only by default.
+        """
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+def running_time(pipeline):
+    """Current running time of a playing pipeline in nanoseconds, the clock GstBuffer PTS are expressed in"""
+    clock = pipeline.get_clock()
+    return clock.get_time() - pipeline.get_base_time() if clock is not None else None
+
+def observe_glass_to_glass(registry, pipeline, pts, name="glass_to_glass"):
+    """Record the time from a buffer's PTS (its capture or arrival time in the pipeline) until now"""
+    now = running_time(pipeline)
+    if pts is not None and now is not None and now >= pts:
+        registry.observe(name, (now - pts) / 1e9)
+
+def instrument_element(registry, element, name=None):
+    """
+        Time how long buffers spend inside a GStreamer element, e.g. the decoder, with pad probes.
+
+        Buffers are matched by PTS between the element's sink and src pads.
+
+        Args:
+            registry (MetricsRegistry): Where to record the durations.
+            element (Gst.Element): The element to instrument.
+            name (str): Stage name. Defaults to the element's name.
+    """
+    if Gst is None:
+        raise RuntimeError("GStreamer (PyGObject) is not available")
+
+    name = name or element.get_name()
+    arrivals = {}
+
+    def on_sink_buffer(pad, info):
+        buffer = info.get_buffer()
+        arrivals[buffer.pts] = time.perf_counter()
+        if len(arrivals) > 256:
+            # Drop entries for buffers the element swallowed
+            arrivals.pop(next(iter(arrivals)))
+        return Gst.PadProbeReturn.OK
+
+    def on_src_buffer(pad, info):
+        start = arrivals.pop(info.get_buffer().pts, None)
+        if start is not None:
+            registry.observe(name, time.perf_counter() - start)
+        return Gst.PadProbeReturn.OK
+
+    element.get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, on_sink_buffer)
+    element.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, on_src_buffer)
+
+def add_metrics_arguments(parser):
+    """Add the metrics export options to an argparse parser"""
+    parser.add_argument("--metrics-jsonl", help="Append a metrics snapshot as JSON lines to this file ('-' for stdout).")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="Seconds between JSON-lines snapshots.")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus-style metrics on this local port.")
+
+def start_exporters(registry, args):
+    """Start the exporters selected by add_metrics_arguments options and return them"""
+    exporters = []
+    if args.metrics_jsonl:
+        path = None if args.metrics_jsonl == "-" else args.metrics_jsonl
+        exporters.append(JsonLinesExporter(registry, path, args.metrics_interval).start())
+    if args.metrics_port:
+        exporters.append(PrometheusExporter(registry, args.metrics_port).start())
+    return exporters
@@ -0,0 +1,85 @@
+import numpy as np
+
+class BoxKalmanFilter:
+    def __init__(self, bbox, process_noise=1.0, measurement_noise=4.0):
+        """
+            Constant-velocity Kalman filter over a bounding box.
+
+            The state is (cx, cy, w, h, vx, vy) with velocities in pixels per frame, so predict() is called once
+            per frame whether or not a measurement follows.
+
+            Args:
+                bbox (tuple): Initial (x, y, w, h).
+                process_noise (float): Standard deviation of the per-frame change in velocity, in pixels.
+                measurement_noise (float): Standard deviation of the tracker's bbox measurements, in pixels.
+        """
+        x, y, w, h = bbox
+        self.state = np.array([x + w / 2, y + h / 2, w, h, 0.0, 0.0])
+        self.covariance = np.diag([measurement_noise ** 2] * 4 + [100.0, 100.0])
+
+        self.transition = np.eye(6)
+        self.transition[0, 4] = self.transition[1, 5] = 1.0
+        self.observation = np.eye(4, 6)
+
+        self.process_covariance = np.diag([0.25, 0.25, 0.25, 0.25, 1.0, 1.0]) * process_noise ** 2
+        self.measurement_covariance = np.eye(4) * measurement_noise ** 2
+
+    @property
+    def bbox(self):
+        """Current (x, y, w, h) estimate"""
+        cx, cy, w, h = self.state[:4]
+        return (cx - w / 2, cy - h / 2, w, h)
+
+    @property
+    def position_std(self):
+        """Standard deviation of the estimated centre, in pixels"""
+        return float(np.sqrt(self.covariance[0, 0] + self.covariance[1, 1]))
+
+    def predict(self):
+        """Advance the state by one frame and return the predicted bbox"""
+        self.state = self.transition @ self.state
+        self.covariance = self.transition @ self.covariance @ self.transition.T + self.process_covariance
+        return self.bbox
+
+    def correct(self, bbox):
+        """Fold a measured (x, y, w, h) into the state and return the filtered bbox"""
+        x, y, w, h = bbox
+        measurement = np.array([x + w / 2, y + h / 2, w, h])
+
+        residual = measurement - self.observation @ self.state
+        residual_covariance = self.observation @ self.covariance @ self.observation.T + self.measurement_covariance
+        gain = self.covariance @ self.observation.T @ np.linalg.inv(residual_covariance)
+
+        self.state = self.state + gain @ residual
+        self.covariance = (np.eye(6) - gain @ self.observation) @ self.covariance
+        return self.bbox
+
+class ScalarKalmanFilter:
+    def __init__(self, process_noise=0.5, measurement_noise=1.0):
+        """
+            Random-walk Kalman filter for a single noisy value, such as an estimated distance.
+
+            The steady-state gain depends only on the ratio of the two noises. The defaults settle at a gain of
+            about 0.39: a step is 90% followed after 5 updates and measurement noise is roughly halved.
+
+            Args:
+                process_noise (float): Standard deviation of the true value's change per update.
+                measurement_noise (float): Standard deviation of the measurements.
+        """
+        self.value = None
+        self.variance = 0.0
+        self.process_variance = process_noise ** 2
+        self.measurement_variance = measurement_noise ** 2
+
+    def update(self, measurement):
+        """Fold in a measurement and return the filtered value"""
+        if self.value is None:
+            self.value = measurement
+            self.variance = self.measurement_variance
+            return self.value
+
+        variance = self.variance + self.process_variance
+        gain = variance / (variance + self.measurement_variance)
+        self.value = self.value + gain * (measurement - self.value)
+        self.variance = (1 - gain) * variance
+        return self.value
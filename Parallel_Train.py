@@ -0,0 +1,180 @@
+import os
+import time
+import random
+import logging
+import argparse
+import itertools
+import multiprocessing
+import numpy as np
+
+from Drone_Env import DroneEnv, add_config_arguments, config_from_args
+from Agent import QLearningAgent
+from Training_Metrics import add_logging_arguments, setup_logging
+
+def evaluate_greedy(agent: QLearningAgent, max_steps: int = 200) -> float:
+    """
+        Run one greedy episode from the training start position and return its total reward.
+
+        Args:
+            agent (QLearningAgent): The agent to evaluate. Its epsilon is restored afterwards.
+            max_steps (int): Step limit, so a policy that stalls at speed 0 still terminates.
+
+        Returns:
+            float: The total reward of the episode.
+    """
+
+    epsilon, agent.epsilon = agent.epsilon, 0.0
+    env = agent.env
+
+    state = env.reset(target_position=(5 * env.screen_width // 6, env.screen_height // 2))
+    total_reward = 0
+
+    for _ in range(max_steps):
+        state, reward, done, _ = env.step(agent.choose_action(state))
+        total_reward += reward
+        if done:
+            break
+
+    agent.epsilon = epsilon
+    return total_reward
+
+def train_worker(job: dict) -> dict:
+    """
+        Train one headless agent. Runs inside a worker process.
+
+        Args:
+            job (dict): The run settings: seed, episodes, alpha, gamma, epsilon and the DroneConfig.
+
+        Returns:
+            dict: The job settings plus the trained q_table, its greedy evaluation return and the timing.
+    """
+
+    random.seed(job["seed"])
+    np.random.seed(job["seed"])
+
+    agent = QLearningAgent(DroneEnv(headless=True, config=job["config"]), alpha=job["alpha"], gamma=job["gamma"], epsilon=job["epsilon"])
+
+    # Keep the workers' progress lines out of the shared terminal
+    logging.disable(logging.INFO)
+
+    start = time.perf_counter()
+    agent.train(episodes=job["episodes"], headless=True)
+    elapsed = time.perf_counter() - start
+
+    return dict(job, q_table=agent.q_table, eval_return=evaluate_greedy(agent), seconds=elapsed, pid=os.getpid())
+
+def make_jobs(episodes: int, runs: int, split: bool, alphas: list, gammas: list, epsilons: list, seed: int, config=None) -> list:
+    """
+        Build the list of training jobs.
+
+        Args:
+            episodes (int): Episodes per run, or in total per setting when split is True.
+            runs (int): Independent runs (different seeds) per alpha/gamma/epsilon setting.
+            split (bool): Split the episodes of each run across the runs instead of repeating them.
+            alphas, gammas, epsilons (list): Hyperparameter values; every combination is trained.
+            seed (int): Base seed; each job gets its own seed from it.
+            config (DroneConfig): State space to train on. Defaults to the original one.
+
+        Returns:
+            list: One dict per job.
+    """
+
+    run_episodes = max(1, episodes // runs) if split else episodes
+
+    jobs = []
+    for alpha, gamma, epsilon in itertools.product(alphas, gammas, epsilons):
+        for _ in range(runs):
+            jobs.append(dict(seed=seed + len(jobs), episodes=run_episodes, alpha=alpha, gamma=gamma, epsilon=epsilon, config=config))
+    return jobs
+
+def merge_results(results: list, merge: str) -> dict:
+    """
+        Combine the trained runs into one.
+
+        Q-values of different alpha/gamma/epsilon settings are on different scales, so "mean" only averages the
+        runs of one setting and then keeps the setting whose averaged table has the highest evaluation return.
+        Ties go to the setting listed first, whatever order the workers finished in.
+
+        Args:
+            results (list): Results returned by train_worker.
+            merge (str): "mean" to average the Q-tables per setting, "best" to keep the run with the highest
+                evaluation return.
+
+        Returns:
+            dict: The chosen result. For "mean" the averaged q_table, its eval_return and the setting's total
+                episodes replace the per-run ones.
+    """
+
+    results = sorted(results, key=lambda result: result["seed"])
+
+    if merge == "best":
+        return max(results, key=lambda result: result["eval_return"])
+
+    settings = {}
+    for result in results:
+        settings.setdefault((result["alpha"], result["gamma"], result["epsilon"]), []).append(result)
+
+    merged = []
+    for runs in settings.values():
+        first = runs[0]
+        agent = QLearningAgent(DroneEnv(headless=True, config=first["config"]), alpha=first["alpha"], gamma=first["gamma"], epsilon=first["epsilon"])
+        agent.q_table = np.mean([run["q_table"] for run in runs], axis=0)
+        merged.append(dict(first, q_table=agent.q_table, eval_return=evaluate_greedy(agent), episodes=sum(run["episodes"] for run in runs)))
+
+    return max(merged, key=lambda result: result["eval_return"])
+
+def train_parallel(jobs: list, workers: int, merge: str = "mean") -> QLearningAgent:
+    """
+        Train the jobs on a process pool and merge them into one agent.
+
+        Args:
+            jobs (list): Jobs from make_jobs.
+            workers (int): Number of worker processes.
+            merge (str): How to combine the runs, see merge_results.
+
+        Returns:
+            QLearningAgent: A headless agent holding the merged Q-table.
+    """
+
+    results = []
+    start = time.perf_counter()
+
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(train_worker, jobs):
+            results.append(result)
+            print(f"[worker {result['pid']}] seed={result['seed']} alpha={result['alpha']} gamma={result['gamma']} epsilon={result['epsilon']}: "
+                  f"{result['episodes'] / result['seconds']:.0f} episodes/sec, eval return {result['eval_return']}")
+
+    elapsed = time.perf_counter() - start
+    total_episodes = sum(result["episodes"] for result in results)
+    print(f"Trained {len(results)} runs, {total_episodes} episodes in {elapsed:.2f}s ({total_episodes / elapsed:.0f} episodes/sec on {workers} workers)")
+
+    merged = merge_results(results, merge)
+    agent = QLearningAgent(DroneEnv(headless=True, config=merged["config"]), alpha=merged["alpha"], gamma=merged["gamma"], epsilon=merged["epsilon"])
+    agent.q_table = merged["q_table"]
+    agent.episodes_trained = merged["episodes"]
+
+    print(f"Merged ({merge}) agent: alpha={merged['alpha']} gamma={merged['gamma']} epsilon={merged['epsilon']}, "
+          f"eval return {evaluate_greedy(agent)}")
+    return agent
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train Q-learning agents on a process pool and merge them.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes.")
+    parser.add_argument("--episodes", type=int, default=1000, help="Episodes per run (total per setting with --split).")
+    parser.add_argument("--runs", type=int, default=None, help="Runs per setting. Defaults to the worker count.")
+    parser.add_argument("--split", action="store_true", help="Split the episodes of each setting across its runs.")
+    parser.add_argument("--alpha", type=float, nargs="+", default=[0.1], help="Learning rate(s).")
+    parser.add_argument("--gamma", type=float, nargs="+", default=[0.9], help="Discount factor(s).")
+    parser.add_argument("--epsilon", type=float, nargs="+", default=[0.2], help="Exploration rate(s).")
+    parser.add_argument("--merge", choices=["mean", "best"], default="mean", help="Average the Q-tables of each setting and keep the best setting, or keep the best run.")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed.")
+    parser.add_argument("--output", default="agent.pkl", help="Where to save the merged agent.")
+    add_config_arguments(parser)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(args)
+
+    jobs = make_jobs(args.episodes, args.runs or args.workers, args.split, args.alpha, args.gamma, args.epsilon, args.seed, config_from_args(args))
+    agent = train_parallel(jobs, args.workers, args.merge)
+    agent.save_agent(args.output)
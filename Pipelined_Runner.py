@@ -0,0 +1,257 @@
+import time
+import argparse
+import threading
+import collections
+import cv2
+
+from Tracker import Tracker
+from Frame_Source import Gst, AppSinkFrameSource
+from Metrics import MetricsRegistry, add_metrics_arguments, start_exporters, instrument_element, observe_glass_to_glass
+from Gst_Pipeline import build_pipeline_description, add_pipeline_arguments, config_from_args
+from test1 import create_pipeline, draw_tracking
+
+class LatestQueue:
+    def __init__(self, maxsize=1, on_drop=None):
+        """
+            Bounded queue that drops its oldest item instead of blocking the producer.
+
+            Args:
+                maxsize (int): Number of items kept.
+                on_drop (callable): Called with every dropped item, e.g. to release a frame.
+        """
+        self.maxsize = maxsize
+        self.on_drop = on_drop
+        self.dropped = 0
+        self.closed = False
+        self._items = collections.deque()
+        self._condition = threading.Condition()
+
+    def put(self, item):
+        """Add an item, dropping the oldest one if the queue is full"""
+        with self._condition:
+            if self.closed:
+                if self.on_drop is not None:
+                    self.on_drop(item)
+                return
+            if len(self._items) >= self.maxsize:
+                dropped = self._items.popleft()
+                self.dropped += 1
+                if self.on_drop is not None:
+                    self.on_drop(dropped)
+            self._items.append(item)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest item, or None if the queue is closed or nothing arrives within the timeout"""
+        with self._condition:
+            if not self._items and not self.closed:
+                self._condition.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        """Wake up consumers and drop what is left"""
+        with self._condition:
+            self.closed = True
+            while self._items:
+                dropped = self._items.popleft()
+                if self.on_drop is not None:
+                    self.on_drop(dropped)
+            self._condition.notify_all()
+
+class WorkItem:
+    def __init__(self, frame):
+        """A captured frame travelling through the stages, with its tracking results"""
+        self.frame = frame
+        self.captured_at = time.monotonic()
+        self.results = []
+
+def release_item(item):
+    item.frame.release()
+
+class PipelinedRunner:
+    def __init__(self, frame_source, tracker=None, focal_length=800, real_object_size=5, queue_size=1, metrics=None, pipeline=None):
+        """
+            Run capture, tracking and display as separate stages.
+
+            Capture and tracking run in their own threads. Display stays on the calling thread, as OpenCV's GUI
+            requires. The stages are connected by LatestQueues, so a slow tracker skips to the freshest frame
+            instead of backing up the appsink.
+
+            Args:
+                frame_source (AppSinkFrameSource): Where frames come from.
+                tracker (Tracker): The tracker to run. A new one is created if None.
+                focal_length (float): Camera focal length in pixels.
+                real_object_size (float): Real size of the tracked object.
+                queue_size (int): Capacity of each queue between stages.
+                metrics (MetricsRegistry): Where stage latencies and drop counts go. A new one is created if None.
+                pipeline (Gst.Pipeline): The source pipeline, used to measure glass-to-glass latency from buffer PTS.
+        """
+        self.frame_source = frame_source
+        self.tracker = tracker or Tracker()
+        self.focal_length = focal_length
+        self.real_object_size = real_object_size
+
+        self.tracker_lock = threading.Lock()
+        self.pending_lock = None
+        self.running = False
+
+        self.metrics = metrics or MetricsRegistry()
+        self.pipeline = pipeline
+
+        def dropped(counter):
+            def on_drop(item):
+                release_item(item)
+                self.metrics.increment(counter)
+            return on_drop
+
+        self.track_queue = LatestQueue(queue_size, on_drop=dropped("dropped_before_track"))
+        self.display_queue = LatestQueue(queue_size, on_drop=dropped("dropped_before_display"))
+
+    def capture_loop(self):
+        """Pull frames from the source and hand them to the tracking stage"""
+        while self.running:
+            start = time.monotonic()
+            frame = self.frame_source.pull()
+            if frame is None:
+                # End of stream: stop every stage instead of spinning on pull()
+                print("End of stream")
+                self.running = False
+                break
+            self.metrics.observe("capture", time.monotonic() - start)
+            self.track_queue.put(WorkItem(frame))
+
+    def track_loop(self):
+        """Run the tracker on the freshest frame and hand the result to the display stage"""
+        while self.running:
+            item = self.track_queue.get(timeout=0.1)
+            if item is None:
+                continue
+
+            start = time.monotonic()
+            with self.tracker_lock:
+                if self.pending_lock is not None:
+                    self.tracker.lock_object(item.frame.image, self.pending_lock)
+                    self.pending_lock = None
+                else:
+                    for object_id, bbox in self.tracker.track_all(item.frame.image).items():
+                        if bbox:
+                            distance = self.tracker.calculate_distance(bbox[2], self.focal_length, self.real_object_size)
+                            distance = self.tracker.smooth_distance(distance, object_id)
+                            locked = object_id == self.tracker.locked_object_id
+                            item.results.append((self.tracker.adjust_bbox(bbox, distance), distance, object_id, locked))
+            self.metrics.observe("track", time.monotonic() - start)
+
+            self.display_queue.put(item)
+
+    def lock_at(self, x, y):
+        """Add a 50x50 target centred on (x, y) on the next frame the tracking stage sees"""
+        with self.tracker_lock:
+            self.pending_lock = (x - 25, y - 25, 50, 50)
+
+    def unlock(self):
+        """Stop tracking the locked object"""
+        with self.tracker_lock:
+            self.pending_lock = None
+            self.tracker.release_object()
+
+    def select(self, object_id):
+        """Make another tracked object the locked one"""
+        with self.tracker_lock:
+            if object_id in self.tracker.trackers:
+                self.tracker.select_object(object_id)
+
+    def report(self):
+        """Print per-stage latency and dropped frame counts"""
+        stages = ", ".join(f"{name} p50 {summary.get('p50_ms', 0):.1f}/p99 {summary.get('p99_ms', 0):.1f} ms"
+                           for name, summary in self.metrics.snapshot()["stages"].items())
+        print(f"{stages}; dropped before track {self.track_queue.dropped}, before display {self.display_queue.dropped}")
+
+    def run(self, window_name="GStreamer Video Stream", report_interval=5.0):
+        """Start the capture and tracking threads and run the display stage until 'q' is pressed"""
+        def on_mouse_click(event, x, y, flags, param):
+            if event == cv2.EVENT_LBUTTONDOWN:
+                self.lock_at(x, y)
+
+        cv2.namedWindow(window_name)
+        cv2.setMouseCallback(window_name, on_mouse_click)
+
+        self.running = True
+        threads = [threading.Thread(target=self.capture_loop, daemon=True),
+                   threading.Thread(target=self.track_loop, daemon=True)]
+        for thread in threads:
+            thread.start()
+
+        last_report = time.monotonic()
+        try:
+            while True:
+                item = self.display_queue.get(timeout=0.1)
+                if item is None and not self.running:
+                    break
+                if item is not None:
+                    start = time.monotonic()
+
+                    image = item.frame.image
+                    for result in item.results:
+                        image = item.frame.writable()
+                        draw_tracking(image, *result)
+
+                    cv2.imshow(window_name, image)
+                    item.frame.release()
+
+                    now = time.monotonic()
+                    self.metrics.observe("display", now - start)
+                    self.metrics.observe("capture_to_display", now - item.captured_at)
+                    if self.pipeline is not None:
+                        observe_glass_to_glass(self.metrics, self.pipeline, item.frame.pts)
+
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord("q"):
+                    break
+                elif key == ord("u"):
+                    self.unlock()
+                elif ord("1") <= key <= ord("9"):
+                    self.select(key - ord("0"))
+
+                if time.monotonic() - last_report >= report_interval:
+                    self.report()
+                    last_report = time.monotonic()
+        finally:
+            self.running = False
+            self.track_queue.close()
+            self.display_queue.close()
+            for thread in threads:
+                thread.join(timeout=1.0)
+            self.tracker.close()
+            self.report()
+
+def main(args):
+    pipeline, appsink, loop = create_pipeline(build_pipeline_description(config_from_args(args)))
+
+    metrics = MetricsRegistry()
+    exporters = start_exporters(metrics, args)
+    decoder = pipeline.get_by_name("decoder")
+    if decoder is not None:
+        instrument_element(metrics, decoder, "decode")
+
+    runner = PipelinedRunner(AppSinkFrameSource(appsink), metrics=metrics, pipeline=pipeline)
+
+    # Start playing the pipeline
+    pipeline.set_state(Gst.State.PLAYING)
+
+    try:
+        print("Streaming video... Press 'q' or Ctrl+C to stop.")
+        runner.run()
+    except KeyboardInterrupt:
+        print("Exiting...")
+    finally:
+        # Stop the pipeline and clean up
+        pipeline.set_state(Gst.State.NULL)
+        cv2.destroyAllWindows()
+        for exporter in exporters:
+            exporter.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Track objects in the drone's UDP video stream with pipelined stages.")
+    add_pipeline_arguments(parser)
+    add_metrics_arguments(parser)
+    main(parser.parse_args())
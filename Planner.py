@@ -0,0 +1,208 @@
+import time
+import argparse
+import numpy as np
+
+from Drone_Env import DroneConfig, add_config_arguments, config_from_args
+from Vector_Drone_Env import VectorDroneEnv
+
+# 10 // speed_step is 0 from here on, so higher step counts behave the same and are merged into this one
+MAX_SPEED_STEP = 11
+
+class TransitionModel:
+    def __init__(self, config: DroneConfig | None = None) -> None:
+        """
+            Deterministic transition and reward arrays of DroneEnv, enumerated by stepping every
+            (speed, distance, speed_step) state with every action through VectorDroneEnv.
+
+            States are indexed by ravel_multi_index over (speed, distance, speed_step - 1). Distances run from 0 up
+            to the start distance of an off-screen target. Overshooting the target ends the episode like ending too
+            close, so no transition leaves this range.
+
+            Args:
+                config (DroneConfig): State space to plan for.
+        """
+
+        self.config = config or DroneConfig()
+        self.max_distance = int(self.config.distance_bins(self.config.screen_width + 1))
+        self.shape = (self.config.num_speeds, self.max_distance + 1, MAX_SPEED_STEP)
+        self.num_states = int(np.prod(self.shape))
+
+        speed, distance, speed_step = (grid.ravel() for grid in np.indices(self.shape))
+        speed_step = speed_step + 1
+
+        # One lane per (state, action) pair
+        env = VectorDroneEnv(len(speed) * 3, autoreset=False, config=self.config)
+        env.drone_speed[:] = np.repeat(speed, 3)
+        env.drone_distance[:] = np.repeat(distance, 3)
+        env.speed_step[:] = np.repeat(speed_step, 3)
+        actions = np.tile(np.arange(3), len(speed))
+        _, rewards, dones, _ = env.step(actions)
+
+        # Overshot lanes are done, so their clamped next state is never used
+        next_state = np.ravel_multi_index((env.drone_speed, np.maximum(env.drone_distance, 0),
+                                           np.minimum(env.speed_step, MAX_SPEED_STEP) - 1), self.shape)
+        self.next_state = next_state.reshape(-1, 3)
+        self.rewards = rewards.reshape(-1, 3).astype(np.float64)
+        self.dones = dones.reshape(-1, 3)
+
+def value_iteration(model: TransitionModel, gamma: float = 0.9, tolerance: float = 1e-10, max_iterations: int = 10000) -> tuple:
+    """
+        Solve the Bellman optimality equation of a transition model.
+
+        Args:
+            model (TransitionModel): The enumerated dynamics.
+            gamma (float): Discount factor, as used by QLearningAgent.
+            tolerance (float): Stop once no state value changes by more than this.
+            max_iterations (int): Upper bound on the number of sweeps.
+
+        Returns:
+            tuple: The (num_states, 3) optimal Q-values and the number of sweeps it took.
+    """
+
+    continues = gamma * ~model.dones
+    values = np.zeros(model.num_states)
+
+    for iteration in range(1, max_iterations + 1):
+        q_values = model.rewards + continues * values[model.next_state]
+        new_values = q_values.max(axis=1)
+        delta = np.abs(new_values - values).max()
+        values = new_values
+        if delta < tolerance:
+            break
+
+    return q_values, iteration
+
+def minimal_speed_steps(model: TransitionModel) -> np.ndarray:
+    """
+        Fewest speed_step a (speed, distance) state can be reached with from any start of DroneEnv.reset (speed 1,
+        speed_step 1, any distance).
+
+        Returns:
+            np.ndarray: (speeds, distances) array of speed_step values, MAX_SPEED_STEP + 1 where unreachable.
+    """
+
+    num_speeds, num_distances, _ = model.shape
+    steps = np.full((num_speeds, num_distances), MAX_SPEED_STEP + 1)
+    steps[1, :] = 1
+
+    next_speed, next_distance, next_step = np.unravel_index(model.next_state, model.shape)
+    reached = ~model.dones
+    speed, distance, speed_step = np.unravel_index(np.arange(model.num_states), model.shape)
+
+    while True:
+        # A state at the speed_step it can first be reached with passes that on to its successors
+        current = (speed_step + 1 == steps[speed, distance])[:, None] & reached
+        candidate = np.full((num_speeds, num_distances), MAX_SPEED_STEP + 1)
+        np.minimum.at(candidate, (next_speed[current], next_distance[current]), next_step[current] + 1)
+        updated = np.minimum(steps, candidate)
+        if np.array_equal(updated, steps):
+            return steps
+        steps = updated
+
+def plan_q_table(config: DroneConfig | None = None, gamma: float = 0.9, tolerance: float = 1e-10) -> np.ndarray:
+    """
+        Solve DroneEnv exactly and export the Q-values in the (speed, distance, action) shape of QLearningAgent.
+
+        The agent's state has no speed_step, so every (speed, distance) pair takes the Q-values of the fewest
+        speed_step it is reachable with, and the hidden distance bin those of the first distance beyond the horizon.
+
+        Args:
+            config (DroneConfig): State space to plan for.
+            gamma (float): Discount factor.
+            tolerance (float): Convergence threshold of value iteration.
+
+        Returns:
+            np.ndarray: The Q-table.
+    """
+
+    config = config or DroneConfig()
+    model = TransitionModel(config)
+    q_values, _ = value_iteration(model, gamma, tolerance)
+    full = q_values.reshape(model.shape + (3,))
+
+    steps = np.minimum(minimal_speed_steps(model), MAX_SPEED_STEP)
+    distances = np.minimum(np.arange(config.num_distances), model.max_distance)
+    speeds = np.arange(config.num_speeds)[:, None]
+    return full[speeds, distances, steps[speeds, distances] - 1]
+
+def evaluate_policy(q_table: np.ndarray, config: DroneConfig | None = None, gamma: float = 0.9, max_steps: int = 500) -> dict:
+    """
+        Roll out the greedy policy of a Q-table from every start distance at once.
+
+        Args:
+            q_table (np.ndarray): (speed, distance, action) Q-table, e.g. from QLearningAgent or plan_q_table.
+            config (DroneConfig): State space the table belongs to.
+            gamma (float): Discount factor of the reported discounted returns.
+            max_steps (int): Step limit, so policies that stall still end.
+
+        Returns:
+            dict: Per start distance the undiscounted and discounted returns and whether the target was reached.
+    """
+
+    config = config or DroneConfig()
+    starts = np.arange(int(config.distance_bins(config.screen_width + 1)) + 1)
+    env = VectorDroneEnv(len(starts), autoreset=False, config=config)
+    env.initial_distance[:] = starts
+    states = env.reset()
+
+    returns = np.zeros(len(starts))
+    discounted = np.zeros(len(starts))
+    reached = np.zeros(len(starts), dtype=bool)
+    running = np.ones(len(starts), dtype=bool)
+
+    for step in range(max_steps):
+        actions = q_table[states[:, 0], states[:, 1]].argmax(axis=1)
+        states, rewards, dones, _ = env.step(actions)
+        returns += np.where(running, rewards, 0)
+        discounted += np.where(running, gamma ** step * rewards, 0)
+        reached |= running & dones & (rewards >= 0)
+        running &= ~dones
+        if not running.any():
+            break
+
+    return {"start_distance": starts, "return": returns, "discounted_return": discounted, "reached": reached}
+
+if __name__ == "__main__":
+    from Drone_Env import DroneEnv
+    from Agent import QLearningAgent
+    from Training_Metrics import add_logging_arguments, setup_logging
+
+    parser = argparse.ArgumentParser(description="Solve DroneEnv exactly with value iteration and compare agents against it.")
+    parser.add_argument("--gamma", type=float, default=0.9, help="Discount factor.")
+    parser.add_argument("--tolerance", type=float, default=1e-10, help="Convergence threshold of value iteration.")
+    parser.add_argument("--output", help="Save the planned Q-table for load_agent, as a pickle or a .qtable checkpoint.")
+    parser.add_argument("--compare", help="Q-table saved by Agent.py to compare with the planned policy.")
+    add_config_arguments(parser)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(args)
+
+    config = config_from_args(args)
+    start = time.perf_counter()
+    model = TransitionModel(config)
+    enumerated = time.perf_counter()
+    _, iterations = value_iteration(model, args.gamma, args.tolerance)
+    solved = time.perf_counter()
+    q_table = plan_q_table(config, args.gamma, args.tolerance)
+
+    print(f"{model.num_states} states: enumerated in {(enumerated - start) * 1000:.1f} ms, "
+          f"value iteration converged in {iterations} sweeps, {(solved - enumerated) * 1000:.1f} ms")
+
+    planned = evaluate_policy(q_table, config, args.gamma)
+    print(f"Planned policy: reaches the target from {planned['reached'].mean():.1%} of start distances, "
+          f"mean return {planned['return'].mean():.2f}")
+
+    if args.compare:
+        agent = QLearningAgent(DroneEnv(headless=True, config=config), gamma=args.gamma)
+        agent.load_agent(args.compare, read_only=True)
+        learned = evaluate_policy(agent.q_table, config, args.gamma)
+        worse = learned["discounted_return"] < planned["discounted_return"] - 1e-9
+        print(f"Learned policy: reaches the target from {learned['reached'].mean():.1%} of start distances, "
+              f"mean return {learned['return'].mean():.2f}")
+        print(f"Learned policy does worse than the planner from {worse.sum()} of {len(worse)} start distances: "
+              f"{planned['start_distance'][worse].tolist()}")
+
+    if args.output:
+        agent = QLearningAgent(DroneEnv(headless=True, config=config), gamma=args.gamma, epsilon=0.0)
+        agent.q_table = q_table
+        agent.save_agent(args.output)
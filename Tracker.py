@@ -0,0 +1,500 @@
+import time
+import threading
+import cv2
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+
+from Motion_Model import BoxKalmanFilter, ScalarKalmanFilter
+
+class TemplateTracker:
+    def __init__(self, search_margin=24, min_score=0.3):
+        """
+            Pure-NumPy tracker that finds the stored template in a window around its last position by
+            normalized cross-correlation, computed with FFTs and integral images.
+
+            Args:
+                search_margin (int): Pixels searched on each side of the last bbox.
+                min_score (float): Correlation below which the target counts as lost.
+        """
+        self.search_margin = search_margin
+        self.min_score = min_score
+        self.template = None
+        self.bbox = None
+
+    @staticmethod
+    def _gray(image):
+        return image.astype(np.float32).mean(axis=2) if image.ndim == 3 else image.astype(np.float32)
+
+    def init(self, frame, bbox):
+        x, y, w, h = (int(v) for v in bbox)
+        x, y = max(x, 0), max(y, 0)
+        template = self._gray(frame[y:y + h, x:x + w])
+        self.template = template - template.mean()
+        self.template_norm = np.sqrt((self.template ** 2).sum())
+        self.bbox = (x, y, template.shape[1], template.shape[0])
+        return True
+
+    def update(self, frame):
+        x, y, w, h = self.bbox
+        frame_h, frame_w = frame.shape[:2]
+        x0, y0 = max(x - self.search_margin, 0), max(y - self.search_margin, 0)
+        x1, y1 = min(x + w + self.search_margin, frame_w), min(y + h + self.search_margin, frame_h)
+
+        window = self._gray(frame[y0:y1, x0:x1])
+        if window.shape[0] < h or window.shape[1] < w or self.template_norm == 0:
+            return False, self.bbox
+
+        # Correlation of every window position with the zero-mean template
+        shape = window.shape
+        spectrum = np.fft.rfft2(window) * np.conj(np.fft.rfft2(self.template, shape))
+        correlation = np.fft.irfft2(spectrum, shape)[:shape[0] - h + 1, :shape[1] - w + 1]
+
+        # Per-position window energy from integral images
+        integral = np.pad(window, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+        integral_sq = np.pad(window ** 2, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+        window_sum = integral[h:, w:] - integral[:-h, w:] - integral[h:, :-w] + integral[:-h, :-w]
+        window_sq = integral_sq[h:, w:] - integral_sq[:-h, w:] - integral_sq[h:, :-w] + integral_sq[:-h, :-w]
+        window_norm = np.sqrt(np.maximum(window_sq - window_sum ** 2 / (w * h), 1e-6))
+
+        score = correlation / (window_norm * self.template_norm)
+        best_y, best_x = np.unravel_index(np.argmax(score), score.shape)
+        if score[best_y, best_x] < self.min_score:
+            return False, self.bbox
+
+        self.bbox = (x0 + int(best_x), y0 + int(best_y), w, h)
+        return True, self.bbox
+
+    def shift(self, dx, dy):
+        """Move the last bbox by (dx, dy), e.g. when the frame it is tracked in is a moving crop"""
+        x, y, w, h = self.bbox
+        self.bbox = (x + int(dx), y + int(dy), w, h)
+
+def _opencv_backend(factory_name):
+    """Return a factory for an OpenCV tracker, falling back to cv2.legacy where OpenCV moved it"""
+    def create():
+        factory = getattr(cv2, factory_name, None) or getattr(getattr(cv2, "legacy", None), factory_name, None)
+        if factory is None:
+            raise ValueError(f"This OpenCV build has no {factory_name}")
+        return factory()
+    return create
+
+# Tracker backends by name
+TRACKER_BACKENDS = {
+    "csrt": _opencv_backend("TrackerCSRT_create"),
+    "kcf": _opencv_backend("TrackerKCF_create"),
+    "mosse": _opencv_backend("TrackerMOSSE_create"),
+    "mil": _opencv_backend("TrackerMIL_create"),
+    "template": TemplateTracker,
+}
+
+# Backends the adaptive mode moves between, from most accurate to fastest
+ADAPTIVE_BACKENDS = ("csrt", "kcf", "mosse")
+
+# Smallest longer side, in pixels, each backend may see the target at when work_size downscales the search window.
+# None never downscales: MOSSE and the template tracker cost less per frame than resizing the window would.
+MIN_WORK_TARGET_SIZE = {"csrt": 48, "kcf": 32, "mosse": None, "mil": 48, "template": None}
+
+# Backends that fail on single-channel frames, e.g. from the GRAY8 pipeline presets. They get a 3-channel copy.
+COLOR_BACKENDS = {"kcf"}
+
+class TrackedObject:
+    def __init__(self, tracker, object_id, frame, bbox):
+        """
+            One target followed by a Tracker: its backend, search window, motion estimate and adaptive state.
+
+            Args:
+                tracker (Tracker): The Tracker holding the settings.
+                object_id (int): The target's ID.
+                frame (np.ndarray): The frame the target is locked on.
+                bbox (tuple): The target's (x, y, w, h) in that frame.
+        """
+        self.tracker = tracker
+        self.object_id = object_id
+        self.backend = None
+
+        self.backend_level = 0
+        self.frame_time = None
+        self.frames_with_headroom = 0
+        self.recovery_wait = tracker.recovery_frames
+        self.stepped_back = False
+
+        self.window = None
+        self.window_scale = 1.0
+        self.velocity = np.zeros(2)
+
+        self.bbox = tuple(bbox)
+        self.size = (int(bbox[2]), int(bbox[3]))
+        self.lost_frames = 0
+
+        self.motion_filter = BoxKalmanFilter(bbox, tracker.process_noise, tracker.measurement_noise) if tracker.motion_model else None
+        self.distance_filter = ScalarKalmanFilter(tracker.distance_process_noise, tracker.distance_noise)
+        self.frames_since_update = 0
+
+        # Appearance kept for re-acquiring the target after the backend loses it
+        x, y, w, h = (max(int(v), 0) for v in bbox)
+        self.appearance = frame[y:y + h, x:x + w].copy()
+
+        self._init_backend(frame, bbox)
+
+    @property
+    def active_backend(self):
+        """Name of the backend currently in use"""
+        return ADAPTIVE_BACKENDS[self.backend_level] if self.tracker.adaptive else self.tracker.backend
+
+    def _needed_margin(self, bbox):
+        """Margin in pixels the target needs around it for the next frame"""
+        return self.tracker.roi_margin * max(bbox[2], bbox[3]) + self.tracker.speed_margin * np.abs(self.velocity).max()
+
+    def _crop(self, frame):
+        """Cut the search window out of the frame and scale it to the working resolution"""
+        x, y, w, h = self.window
+        crop = frame[y:y + h, x:x + w]
+        if self.window_scale < 1.0:
+            crop = cv2.resize(crop, None, fx=self.window_scale, fy=self.window_scale, interpolation=cv2.INTER_AREA)
+        return crop
+
+    def _backend_frame(self, frame):
+        """The frame as the backend sees it: cropped to the search window in ROI mode, with three channels if needed"""
+        if self.tracker.roi:
+            frame = self._crop(frame)
+        if frame.ndim == 2 and self.active_backend in COLOR_BACKENDS:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        return frame
+
+    def _place_window(self, frame, bbox):
+        """Place the search window around bbox and choose its working scale"""
+        tracker = self.tracker
+
+        # Three times the needed margin, so the window only moves every few frames
+        margin = 3 * self._needed_margin(bbox)
+        frame_h, frame_w = frame.shape[:2]
+        x0, y0 = max(int(bbox[0] - margin), 0), max(int(bbox[1] - margin), 0)
+        x1, y1 = min(int(bbox[0] + bbox[2] + margin), frame_w), min(int(bbox[1] + bbox[3] + margin), frame_h)
+
+        self.window = (x0, y0, x1 - x0, y1 - y0)
+        self.window_scale = 1.0
+        min_size = MIN_WORK_TARGET_SIZE.get(self.active_backend)
+        if tracker.work_size and min_size is not None:
+            min_size = max(min_size, tracker.min_target_size)
+            self.window_scale = min(1.0, max(tracker.work_size / max(x1 - x0, y1 - y0), min_size / max(bbox[2], bbox[3])))
+
+    def _init_backend(self, frame, bbox):
+        """Create the backend and initialize it on the frame, or on a new search window around bbox in ROI mode"""
+        with self.tracker._inits_lock:
+            # Targets initialize on the track_all worker threads
+            self.tracker.backend_inits += 1
+        if self.tracker.roi:
+            self._place_window(frame, bbox)
+            x0, y0, _, _ = self.window
+            bbox = ((bbox[0] - x0) * self.window_scale, (bbox[1] - y0) * self.window_scale,
+                    bbox[2] * self.window_scale, bbox[3] * self.window_scale)
+
+        frame = self._backend_frame(frame)
+        self.backend = TRACKER_BACKENDS[self.active_backend]()
+        self.backend.init(frame, tuple(int(round(v)) for v in bbox))
+        if self.active_backend == "kcf":
+            # OpenCV's KCF reports the init position for the first frame after init, which leaves it a frame behind
+            self.backend.update(frame)
+
+    def _locked_bbox(self, frame, bbox):
+        """
+            The target at the locked size around bbox's centre, snapped to the best match of the stored appearance
+            nearby. Re-initializing from this instead of the backend's own bbox keeps size and position errors from
+            adding up every time the search window moves.
+        """
+        w, h = self.size
+        x = int(round(bbox[0] + (bbox[2] - w) / 2))
+        y = int(round(bbox[1] + (bbox[3] - h) / 2))
+
+        margin = max(w, h) // 4
+        frame_h, frame_w = frame.shape[:2]
+        x0, y0 = max(x - margin, 0), max(y - margin, 0)
+        x1, y1 = min(x + w + margin, frame_w), min(y + h + margin, frame_h)
+        search = frame[y0:y1, x0:x1]
+        if search.shape[0] >= h and search.shape[1] >= w:
+            scores = cv2.matchTemplate(search, self.appearance, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (best_x, best_y) = cv2.minMaxLoc(scores)
+            if score >= self.tracker.reacquire_threshold:
+                x, y = x0 + best_x, y0 + best_y
+
+        return (x, y, w, h)
+
+    def _move_window(self, frame, bbox):
+        """Move the search window to bbox: by a pure offset if the backend allows it, otherwise by re-initializing"""
+        if self.window_scale == 1.0 and hasattr(self.backend, "shift"):
+            old_x0, old_y0, _, _ = self.window
+            self._place_window(frame, bbox)
+            if self.window_scale == 1.0:
+                self.backend.shift(old_x0 - self.window[0], old_y0 - self.window[1])
+                return bbox
+
+        bbox = self._locked_bbox(frame, bbox)
+        self._init_backend(frame, bbox)
+        return bbox
+
+    def _update_roi(self, frame, bbox):
+        """Map a window bbox back to the frame, update the motion estimate and move the window if needed"""
+        x0, y0, w, h = self.window
+        scale = self.window_scale
+        bbox = (x0 + bbox[0] / scale, y0 + bbox[1] / scale, bbox[2] / scale, bbox[3] / scale)
+
+        motion = np.array([bbox[0] - self.bbox[0], bbox[1] - self.bbox[1]])
+        self.velocity = 0.5 * self.velocity + 0.5 * motion
+
+        # Room left between the target and the window border, ignoring borders that are the frame's edge
+        frame_h, frame_w = frame.shape[:2]
+        room = [bbox[0] - x0 if x0 > 0 else np.inf,
+                bbox[1] - y0 if y0 > 0 else np.inf,
+                x0 + w - bbox[0] - bbox[2] if x0 + w < frame_w else np.inf,
+                y0 + h - bbox[1] - bbox[3] if y0 + h < frame_h else np.inf]
+        if min(room) < self._needed_margin(bbox):
+            bbox = self._move_window(frame, bbox)
+
+        return bbox
+
+    def _adapt(self, frame, elapsed, bbox):
+        """Switch to a faster or slower backend depending on the smoothed per-frame time"""
+        tracker = self.tracker
+        self.frame_time = elapsed if self.frame_time is None else 0.9 * self.frame_time + 0.1 * elapsed
+
+        level = self.backend_level
+        if self.frame_time > tracker.frame_budget and level < len(ADAPTIVE_BACKENDS) - 1:
+            level += 1
+            if self.stepped_back:
+                self.recovery_wait = min(2 * self.recovery_wait, 64 * tracker.recovery_frames)
+            self.stepped_back = False
+        elif self.frame_time < tracker.headroom * tracker.frame_budget and level > 0:
+            self.frames_with_headroom += 1
+            if self.frames_with_headroom >= self.recovery_wait:
+                level -= 1
+                self.stepped_back = True
+        else:
+            self.frames_with_headroom = 0
+
+        if level != self.backend_level:
+            self.backend_level = level
+            self._init_backend(frame, bbox or self.bbox)
+            self.frame_time = None
+            self.frames_with_headroom = 0
+
+    def _reacquire(self, frame):
+        """Look for the stored appearance around the last position and re-initialize the backend if it is found"""
+        x, y, w, h = (int(v) for v in self.bbox)
+        margin = int(max(w, h) * (1 + self.lost_frames * 0.5))
+        frame_h, frame_w = frame.shape[:2]
+        x0, y0 = max(x - margin, 0), max(y - margin, 0)
+        x1, y1 = min(x + w + margin, frame_w), min(y + h + margin, frame_h)
+
+        search = frame[y0:y1, x0:x1]
+        if search.shape[0] < self.appearance.shape[0] or search.shape[1] < self.appearance.shape[1]:
+            return None
+
+        scores = cv2.matchTemplate(search, self.appearance, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (best_x, best_y) = cv2.minMaxLoc(scores)
+        if score < self.tracker.reacquire_threshold:
+            return None
+
+        bbox = (x0 + best_x, y0 + best_y, self.appearance.shape[1], self.appearance.shape[0])
+        self.velocity = np.zeros(2)
+        self._init_backend(frame, bbox)
+        return bbox
+
+    def _predict_only(self):
+        """Whether this frame can use the motion model's prediction instead of running the backend"""
+        tracker = self.tracker
+        return (self.motion_filter is not None and self.lost_frames == 0
+                and self.frames_since_update < tracker.update_interval
+                and self.motion_filter.position_std <= tracker.max_uncertainty * max(self.bbox[2], self.bbox[3]))
+
+    def update(self, frame):
+        """Track the target in a new frame. Returns its bbox, or None while it is lost"""
+        self.frames_since_update += 1
+        if self.motion_filter is not None:
+            predicted = self.motion_filter.predict()
+            if self._predict_only():
+                self.bbox = predicted
+                return self.bbox
+
+        start = time.perf_counter()
+        success, bbox = self.backend.update(self._backend_frame(frame))
+        if success and self.tracker.roi:
+            bbox = self._update_roi(frame, bbox)
+        if self.tracker.adaptive:
+            self._adapt(frame, time.perf_counter() - start, bbox if success else None)
+        self.frames_since_update = 0
+
+        if not success:
+            self.lost_frames += 1
+            bbox = self._reacquire(frame)
+            if bbox is None:
+                return None
+
+        self.lost_frames = 0
+        if self.motion_filter is not None:
+            bbox = self.motion_filter.correct(bbox)
+        self.bbox = tuple(bbox)
+        return self.bbox
+
+class Tracker:
+    def __init__(self, backend="csrt", frame_budget_ms=33.0, headroom=0.5, recovery_frames=30,
+                 roi=False, roi_margin=1.0, speed_margin=4.0, work_size=None, min_target_size=32,
+                 max_workers=None, max_lost_frames=30, reacquire_threshold=0.6,
+                 motion_model=False, update_interval=1, max_uncertainty=0.25, process_noise=1.0, measurement_noise=4.0,
+                 distance_noise=1.0, distance_process_noise=0.5):
+        """
+            Args:
+                backend (str): Name of a TRACKER_BACKENDS entry, or "adaptive" to move along ADAPTIVE_BACKENDS:
+                    one step faster when the per-frame time goes over the budget, one step back after
+                    recovery_frames frames under headroom * budget.
+                frame_budget_ms (float): Per-frame tracking budget of the adaptive mode.
+                headroom (float): Fraction of the budget under which the adaptive mode steps back.
+                recovery_frames (int): Frames with headroom needed before stepping back. Doubles every time a step
+                    back has to be undone, so the mode does not keep bouncing off the budget.
+                roi (bool): Run the backend on a search window around the target instead of the full frame.
+                    The window is kept fixed and only moved when the target gets closer to its border than the
+                    margin it needs: by a pure offset for backends that support it, otherwise by re-initializing
+                    the backend at the locked target size, placed with the stored appearance.
+                roi_margin (float): Margin the target needs on each side, as a fraction of its size.
+                speed_margin (float): Extra margin, in frames of the estimated target motion.
+                work_size (int): Downscale the search window so its longer side is at most this many pixels.
+                min_target_size (int): Never downscale the target's longer side below this many pixels, nor below
+                    the backend's own MIN_WORK_TARGET_SIZE.
+                max_workers (int): Threads used to update several targets at once. OpenCV releases the GIL,
+                    so targets are updated in parallel.
+                max_lost_frames (int): Frames a target may stay lost before it is dropped.
+                reacquire_threshold (float): Template match score needed to re-acquire a lost target.
+                motion_model (bool): Filter every target through a constant-velocity Kalman filter. Returned
+                    bboxes are the filtered estimates.
+                update_interval (int): With the motion model, run the backend only every this many frames and use
+                    the predicted bbox in between.
+                max_uncertainty (float): Run the backend early once the predicted centre's standard deviation
+                    exceeds this fraction of the target's size.
+                process_noise (float): Kalman process noise, see BoxKalmanFilter.
+                measurement_noise (float): Kalman measurement noise, see BoxKalmanFilter.
+                distance_noise (float): Measurement noise of smooth_distance, in distance units.
+                distance_process_noise (float): How fast smooth_distance lets the distance change per update.
+                    Relative to distance_noise it sets the lag: the default follows a step within about 5 frames,
+                    as the speed controller fed from it needs.
+        """
+        if backend != "adaptive" and backend not in TRACKER_BACKENDS:
+            raise ValueError(f"Unknown tracker backend {backend!r}, expected one of {sorted(TRACKER_BACKENDS)} or 'adaptive'")
+
+        self.trackers = {}
+        self.locked_object_id = None
+        self.next_object_id = 1
+
+        self.backend = backend
+        self.adaptive = backend == "adaptive"
+        self.frame_budget = frame_budget_ms / 1000
+        self.headroom = headroom
+        self.recovery_frames = recovery_frames
+
+        self.roi = roi
+        self.roi_margin = roi_margin
+        self.speed_margin = speed_margin
+        self.work_size = work_size
+        self.min_target_size = min_target_size
+
+        self.max_workers = max_workers
+        self.max_lost_frames = max_lost_frames
+        self.reacquire_threshold = reacquire_threshold
+        self._executor = None
+        self.backend_inits = 0
+        self._inits_lock = threading.Lock()
+
+        self.motion_model = motion_model
+        self.update_interval = update_interval
+        self.max_uncertainty = max_uncertainty
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.distance_noise = distance_noise
+        self.distance_process_noise = distance_process_noise
+
+    @property
+    def manual_tracker(self):
+        """Backend of the locked object, or None. Setting it to None releases the locked object"""
+        target = self.trackers.get(self.locked_object_id)
+        return target.backend if target is not None else None
+
+    @manual_tracker.setter
+    def manual_tracker(self, value):
+        if value is not None:
+            raise ValueError("Use lock_object to start tracking")
+        self.release_object()
+
+    @property
+    def active_backend(self):
+        """Name of the backend the locked object currently uses"""
+        target = self.trackers.get(self.locked_object_id)
+        return target.active_backend if target is not None else self.backend
+
+    def lock_object(self, frame, bbox, object_id=None):
+        """Lock an object for tracking, make it the locked object and return its ID"""
+        if object_id is None:
+            object_id = self.next_object_id
+        self.next_object_id = max(self.next_object_id, object_id + 1)
+
+        self.trackers[object_id] = TrackedObject(self, object_id, frame, bbox)
+        self.locked_object_id = object_id
+        return object_id
+
+    def select_object(self, object_id):
+        """Make an already tracked object the locked one"""
+        if object_id not in self.trackers:
+            raise KeyError(f"No tracked object with ID {object_id}")
+        self.locked_object_id = object_id
+
+    def release_object(self, object_id=None):
+        """Stop tracking an object, the locked one by default"""
+        object_id = self.locked_object_id if object_id is None else object_id
+        self.trackers.pop(object_id, None)
+        if object_id == self.locked_object_id:
+            self.locked_object_id = None
+
+    def track_all(self, frame):
+        """Update every tracked object and return {object_id: bbox or None while lost}"""
+        targets = list(self.trackers.values())
+        if len(targets) > 1:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers)
+            bboxes = list(self._executor.map(lambda target: target.update(frame), targets))
+        else:
+            bboxes = [target.update(frame) for target in targets]
+
+        results = {}
+        for target, bbox in zip(targets, bboxes):
+            if bbox is None and target.lost_frames > self.max_lost_frames:
+                self.release_object(target.object_id)
+                continue
+            results[target.object_id] = [int(v) for v in bbox] if bbox is not None else None
+        return results
+
+    def track_object(self, frame):
+        """Track the manually selected object"""
+        if self.trackers:
+            return self.track_all(frame).get(self.locked_object_id)
+        return None
+
+    def close(self):
+        """Shut down the thread pool track_all uses for several targets. The tracker can still be used afterwards"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def calculate_distance(self, object_size, focal_length, real_object_size):
+        """Estimate the distance of the object"""
+        distance = (real_object_size * focal_length) / object_size
+        return distance
+
+    def smooth_distance(self, distance, object_id=None):
+        """Filter a distance estimate of a tracked object, the locked one by default"""
+        target = self.trackers.get(self.locked_object_id if object_id is None else object_id)
+        return target.distance_filter.update(distance) if target is not None else distance
+
+    def adjust_bbox(self, bbox, distance, max_distance=1000):
+        """Dynamically adjust the bounding box size based on distance"""
+        scale_factor = max(1, distance / max_distance)
+        new_bbox = (int(bbox[0] - scale_factor * 10), int(bbox[1] - scale_factor * 10),
+                    int(bbox[2] + scale_factor * 20), int(bbox[3] + scale_factor * 20))
+        return new_bbox
@@ -0,0 +1,329 @@
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+
+from Tracker import Tracker, TRACKER_BACKENDS
+from Frame_Source import Gst, GstLaunchFrameSource, SyntheticFrameSource
+from Gst_Pipeline import CODECS, PRESETS, build_pipeline_description, build_sender_description
+from Metrics import MetricsRegistry, add_metrics_arguments, start_exporters, observe_glass_to_glass
+
+@dataclasses.dataclass
+class StreamConfig:
+    """
+        One camera feed served by the tracking server.
+
+        Attributes:
+            name (str): Name the results are published under.
+            port (int): UDP port of the RTP stream.
+            codec (str): Key of Gst_Pipeline.CODECS.
+            focal_length (float): Camera focal length in pixels, for Tracker.calculate_distance.
+            real_object_size (float): Real size of the tracked object, for Tracker.calculate_distance.
+            bbox (list): Initial (x, y, w, h) to lock on the first frame. Required for UDP streams; synthetic streams
+                lock on their ground truth when it is None.
+            backend (str): Tracker backend.
+            preset (str): Receiving pipeline preset of Gst_Pipeline.PRESETS.
+            source (str): "synthetic" to track generated frames instead of a UDP stream.
+            frames (int): Number of frames of a synthetic source.
+            framerate (float): Frame rate of a synthetic source.
+    """
+    name: str
+    port: int = 5600
+    codec: str = "h264"
+    focal_length: float = 800
+    real_object_size: float = 5
+    bbox: list | None = None
+    backend: str = "csrt"
+    preset: str = "low-latency"
+    source: str | None = None
+    frames: int = 300
+    framerate: float = 30
+
+    def __post_init__(self):
+        if self.source is None and self.bbox is None:
+            # Nothing can lock a target later, so the stream would publish empty results forever
+            raise ValueError(f"Stream {self.name!r} needs a bbox to lock on its first frame")
+
+def load_stream_configs(path):
+    """Read stream configs from a JSON file holding a list of objects, or an object with a "streams" list"""
+    with open(path) as f:
+        data = json.load(f)
+    entries = data["streams"] if isinstance(data, dict) else data
+    configs = [StreamConfig(**entry) for entry in entries]
+
+    ports = [config.port for config in configs if config.source is None]
+    if len(ports) != len(set(ports)):
+        raise ValueError("Every UDP stream needs its own port")
+    return configs
+
+class ResultPublisher:
+    def __init__(self, target="-"):
+        """
+            Publish track results as JSON lines.
+
+            Args:
+                target (str): "-" for stdout, "udp://host:port" or "unix:///path" for one datagram per result,
+                    anything else is a file to append to.
+        """
+        self._lock = threading.Lock()
+        self._file = None
+        self._socket = None
+        self._address = None
+
+        if target == "-":
+            self._file = sys.stdout
+        elif target.startswith("udp://"):
+            host, port = target[len("udp://"):].rsplit(":", 1)
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._address = (host, int(port))
+        elif target.startswith("unix://"):
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._address = target[len("unix://"):]
+        else:
+            self._file = open(target, "a", buffering=1)
+
+    def publish(self, result):
+        """Send one result dict"""
+        line = json.dumps(result)
+        with self._lock:
+            if self._socket is not None:
+                try:
+                    self._socket.sendto(line.encode(), self._address)
+                except OSError:
+                    # Nobody listening; results are a live feed, not a log
+                    pass
+            else:
+                self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            if self._socket is not None:
+                self._socket.close()
+            elif self._file is not sys.stdout:
+                self._file.close()
+            else:
+                self._file.flush()
+
+class TrackedStream:
+    def __init__(self, config, executor, publisher, metrics):
+        """
+            Tracker and frame source of one feed.
+
+            A capture thread pulls frames and keeps only the newest one. Tracking runs as a task on the shared
+            executor, one at a time per stream, so a slow stream drops its own frames without holding up the others.
+
+            Args:
+                config (StreamConfig): The feed.
+                executor (ThreadPoolExecutor): Pool shared by all streams.
+                publisher (ResultPublisher): Where results go.
+                metrics (MetricsRegistry): Per-stream latency histograms.
+        """
+        self.config = config
+        self.executor = executor
+        self.publisher = publisher
+        self.metrics = metrics
+        self.tracker = Tracker(config.backend)
+        self.initial_bbox = tuple(config.bbox) if config.bbox is not None else None
+
+        if config.source == "synthetic":
+            self.frame_source = SyntheticFrameSource(num_frames=config.frames, framerate=config.framerate)
+        else:
+            pipeline_config = dataclasses.replace(PRESETS[config.preset], port=config.port, codec=config.codec)
+            self.frame_source = GstLaunchFrameSource(build_pipeline_description(pipeline_config))
+
+        self.frames_received = 0
+        self.frames_tracked = 0
+        self.frames_dropped = 0
+        self.finished = threading.Event()
+
+        self._pending = None
+        self._scheduled = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._capture_thread = threading.Thread(target=self._capture_loop, name=f"capture-{config.name}", daemon=True)
+
+    def start(self):
+        self._capture_thread.start()
+        return self
+
+    def _capture_loop(self):
+        """Pull frames and hand the newest one to the executor"""
+        while not self._stop.is_set():
+            frame = self.frame_source.pull()
+            if frame is None:
+                break
+            frame.received_at = time.perf_counter()
+            self.frames_received += 1
+
+            with self._lock:
+                # stop() sets _stop under the same lock, so nothing is submitted once the executor may be shut down
+                if self._stop.is_set():
+                    frame.release()
+                    break
+                if self._pending is not None:
+                    self._pending.release()
+                    self.frames_dropped += 1
+                self._pending = frame
+                if not self._scheduled:
+                    self._scheduled = True
+                    self.executor.submit(self._process)
+
+        # Let the last frame drain before reporting the stream finished
+        while True:
+            with self._lock:
+                if not self._scheduled:
+                    break
+            time.sleep(0.001)
+        self.finished.set()
+
+    def _process(self):
+        """Track pending frames until none is left"""
+        while True:
+            with self._lock:
+                frame = self._pending
+                self._pending = None
+                if frame is None:
+                    self._scheduled = False
+                    return
+            try:
+                with frame:
+                    self._track(frame)
+            except Exception as error:
+                print(f"Stream {self.config.name}: {error}", file=sys.stderr)
+
+    def _track(self, frame):
+        """Track one frame and publish the result"""
+        config = self.config
+        if self.frames_tracked == 0 and self.initial_bbox is None and frame.ground_truth is not None:
+            self.initial_bbox = frame.ground_truth
+
+        with self.metrics.time(f"track.{config.name}"):
+            if self.frames_tracked == 0 and self.initial_bbox is not None:
+                object_id = self.tracker.lock_object(frame.image, self.initial_bbox)
+                bboxes = {object_id: list(self.initial_bbox)}
+            else:
+                bboxes = self.tracker.track_all(frame.image)
+        self.frames_tracked += 1
+
+        objects = []
+        for object_id, bbox in bboxes.items():
+            distance = None
+            if bbox:
+                distance = self.tracker.calculate_distance(bbox[2], config.focal_length, config.real_object_size)
+                distance = round(float(self.tracker.smooth_distance(distance, object_id)), 3)
+            objects.append({"id": object_id, "bbox": bbox, "distance": distance,
+                            "locked": object_id == self.tracker.locked_object_id})
+
+        self.metrics.observe(f"queue.{config.name}", time.perf_counter() - frame.received_at)
+        if isinstance(self.frame_source, GstLaunchFrameSource):
+            observe_glass_to_glass(self.metrics, self.frame_source.pipeline, frame.pts, f"glass_to_glass.{config.name}")
+
+        self.publisher.publish({
+            "stream": config.name,
+            "frame": self.frames_tracked,
+            "timestamp": time.time(),
+            "pts": frame.pts,
+            "objects": objects,
+        })
+
+    def stop(self):
+        with self._lock:
+            self._stop.set()
+        self.frame_source.close()
+
+class TrackingServer:
+    def __init__(self, configs, publisher, workers=None, metrics=None):
+        """
+            Track several camera feeds in one headless process.
+
+            Args:
+                configs (list): StreamConfig of every feed.
+                publisher (ResultPublisher): Where results go.
+                workers (int): Size of the shared tracking pool. Defaults to one per stream.
+                metrics (MetricsRegistry): Latency histograms, a new registry if None.
+        """
+        self.metrics = metrics or MetricsRegistry()
+        self.executor = ThreadPoolExecutor(workers or len(configs), thread_name_prefix="track")
+        self.streams = [TrackedStream(config, self.executor, publisher, self.metrics) for config in configs]
+
+    def run(self, duration=None):
+        """Serve until every stream has ended, the duration in seconds has passed or Ctrl+C"""
+        start = time.monotonic()
+        for stream in self.streams:
+            stream.start()
+        try:
+            while not all(stream.finished.is_set() for stream in self.streams):
+                if duration is not None and time.monotonic() - start >= duration:
+                    break
+                time.sleep(0.1)
+        except KeyboardInterrupt:
+            print("Exiting...", file=sys.stderr)
+        finally:
+            elapsed = time.monotonic() - start
+            for stream in self.streams:
+                stream.stop()
+            self.executor.shutdown(wait=True)
+            for stream in self.streams:
+                stream.tracker.close()
+        return elapsed
+
+    def report(self, elapsed):
+        """Print per-stream and total tracked frame rates"""
+        total = 0
+        for stream in self.streams:
+            total += stream.frames_tracked
+            print(f"{stream.config.name}: {stream.frames_tracked / elapsed:.1f} FPS tracked, "
+                  f"{stream.frames_received} received, {stream.frames_dropped} dropped", file=sys.stderr)
+        print(f"Total: {total / elapsed:.1f} FPS over {len(self.streams)} streams", file=sys.stderr)
+
+def start_loopback_senders(configs, width=1280, height=720, framerate=30):
+    """Start a local videotestsrc sender for every UDP stream, to test the server without drones"""
+    senders = []
+    for config in configs:
+        if config.source is None:
+            sender = Gst.parse_launch(build_sender_description(config.port, config.codec, width=width, height=height,
+                                                               framerate=framerate))
+            sender.set_state(Gst.State.PLAYING)
+            senders.append(sender)
+    return senders
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Track several UDP camera feeds headless and publish the results.")
+    parser.add_argument("--config", help="JSON file with the stream configs.")
+    parser.add_argument("--synthetic", type=int, default=0, help="Add this many synthetic streams, for testing without GStreamer.")
+    parser.add_argument("--loopback", type=int, default=0, help="Add this many UDP streams from port 5600 up and feed them from local test senders.")
+    parser.add_argument("--codec", choices=sorted(CODECS), default="h264", help="Codec of the --loopback streams.")
+    parser.add_argument("--backend", choices=sorted(TRACKER_BACKENDS) + ["adaptive"], default="csrt", help="Tracker backend of generated streams.")
+    parser.add_argument("--frames", type=int, default=300, help="Frames per synthetic stream.")
+    parser.add_argument("--workers", type=int, default=None, help="Size of the shared tracking pool (default: one per stream).")
+    parser.add_argument("--output", default="-", help="'-' for stdout, udp://host:port, unix:///path or a JSON-lines file.")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds.")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    configs = load_stream_configs(args.config) if args.config else []
+    configs += [StreamConfig(f"synthetic-{i}", source="synthetic", backend=args.backend, frames=args.frames)
+                for i in range(args.synthetic)]
+    # Loopback senders draw a ball near the centre of the frame, lock onto it
+    configs += [StreamConfig(f"loopback-{i}", port=5600 + i, codec=args.codec, backend=args.backend, bbox=[600, 320, 80, 80])
+                for i in range(args.loopback)]
+    if not configs:
+        parser.error("No streams: give --config, --synthetic or --loopback")
+
+    senders = start_loopback_senders(configs[len(configs) - args.loopback:]) if args.loopback else []
+    publisher = ResultPublisher(args.output)
+    server = TrackingServer(configs, publisher, args.workers)
+    exporters = start_exporters(server.metrics, args)
+    try:
+        elapsed = server.run(args.duration)
+        server.report(elapsed)
+    finally:
+        for sender in senders:
+            sender.set_state(Gst.State.NULL)
+        for exporter in exporters:
+            exporter.stop()
+        publisher.close()
@@ -0,0 +1,114 @@
+import csv
+import logging
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # CSV output works without pyarrow
+    pa = None
+
+# One row per training episode
+EPISODE_DTYPE = np.dtype([
+    ("episode", np.int64),
+    ("return", np.float64),
+    ("length", np.int64),
+    ("mean_abs_q_delta", np.float64),
+    ("max_abs_q_delta", np.float64),
+    ("steps_per_sec", np.float64),
+])
+
+class TrainingMetrics:
+    def __init__(self, capacity: int = 100_000) -> None:
+        """
+            Per-episode training telemetry kept in a fixed-size NumPy ring buffer.
+
+            Recording an episode writes one row in place; once capacity episodes are stored the oldest are
+            overwritten, so memory stays bounded however long training runs.
+
+            Args:
+                capacity (int): Number of episodes kept.
+        """
+
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=EPISODE_DTYPE)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def record(self, episode: int, episode_return: float, length: int, mean_abs_q_delta: float, max_abs_q_delta: float,
+               steps_per_sec: float) -> None:
+        """
+            Store the statistics of one finished episode.
+
+            Args:
+                episode (int): Episode number.
+                episode_return (float): Total reward of the episode.
+                length (int): Number of steps.
+                mean_abs_q_delta (float): Mean absolute change the episode's updates made to the Q-table.
+                max_abs_q_delta (float): Largest absolute change of a single update.
+                steps_per_sec (float): Environment steps per second of wall time, updates included.
+        """
+
+        self.buffer[self.count % self.capacity] = (episode, episode_return, length, mean_abs_q_delta, max_abs_q_delta, steps_per_sec)
+        self.count += 1
+
+    def to_array(self) -> np.ndarray:
+        """
+            Returns:
+                np.ndarray: The stored episodes in the order they were recorded, as a structured array.
+        """
+
+        if self.count <= self.capacity:
+            return self.buffer[:self.count].copy()
+        start = self.count % self.capacity
+        return np.concatenate((self.buffer[start:], self.buffer[:start]))
+
+    def summary(self, last: int = 100) -> dict:
+        """
+            Returns:
+                dict: Mean return, length and steps per second over the last episodes.
+        """
+
+        rows = self.to_array()[-last:]
+        if len(rows) == 0:
+            return {"episodes": 0}
+        return {
+            "episodes": self.count,
+            "mean_return": float(rows["return"].mean()),
+            "mean_length": float(rows["length"].mean()),
+            "steps_per_sec": float(rows["steps_per_sec"].mean()),
+        }
+
+    def write_csv(self, filename: str) -> None:
+        """Write the stored episodes to a CSV file with a header row"""
+        rows = self.to_array()
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(EPISODE_DTYPE.names)
+            writer.writerows(rows.tolist())
+
+    def write_parquet(self, filename: str) -> None:
+        """Write the stored episodes to a Parquet file. Needs pyarrow"""
+        if pa is None:
+            raise RuntimeError("Writing Parquet needs pyarrow, install it or write CSV instead")
+        rows = self.to_array()
+        pq.write_table(pa.table({name: rows[name] for name in EPISODE_DTYPE.names}), filename)
+
+    def write(self, filename: str) -> None:
+        """Write the stored episodes as Parquet for .parquet file names and as CSV otherwise"""
+        if filename.endswith(".parquet"):
+            self.write_parquet(filename)
+        else:
+            self.write_csv(filename)
+
+def add_logging_arguments(parser) -> None:
+    """Add the log level option to an argparse parser"""
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="DEBUG adds the environment's per-step output.")
+
+def setup_logging(args) -> None:
+    """Configure the root logger from add_logging_arguments options"""
+    logging.basicConfig(level=args.log_level, format="%(message)s")
@@ -0,0 +1,133 @@
+import time
+import argparse
+import numpy as np
+
+from Drone_Env import DroneConfig
+
+class VectorDroneEnv():
+    def __init__(self, num_envs: int, target_positions: int | np.ndarray | None = None, autoreset: bool = True,
+                 config: DroneConfig | None = None) -> None:
+        """
+            Initialize a batch of drone environments stepped together with NumPy.
+
+            Every lane follows exactly the same rules as DroneEnv.step, on the same DroneConfig.
+
+            Args:
+                num_envs (int): Number of environments in the batch.
+                target_positions (int | np.ndarray): Target x-position (in pixels) for every lane, or one per lane.
+                    Defaults to the same off-screen position DroneEnv.reset uses.
+                autoreset (bool): Reset finished lanes to their target position inside step().
+                config (DroneConfig): Geometry and state space. Defaults to the original 1500-pixel world.
+        """
+
+        self.config = config or DroneConfig()
+
+        self.num_envs = num_envs
+        self.autoreset = autoreset
+
+        self.max_speed = self.config.max_speed
+        self.max_distance = self.config.horizon_bins
+        self.target_distance_range = self.config.window_bins
+        self.speed_bins = self.config.speed_bins
+        self.hidden_distance = self.config.hidden_bin # Distance value reported when the target is not visible
+
+        self.initial_distance = np.full(num_envs, self.config.distance_bins(self.config.screen_width + 1), dtype=np.int64)
+        self.drone_speed = np.empty(num_envs, dtype=np.int64)
+        self.drone_distance = np.empty(num_envs, dtype=np.int64)
+        self.speed_step = np.empty(num_envs, dtype=np.int64)
+
+        self.reset(target_positions)
+
+    def _reset_lanes(self, lanes: np.ndarray | slice) -> None:
+        """
+            Reset the given lanes to their initial target position.
+
+            Args:
+                lanes (np.ndarray | slice): Boolean mask or slice of the lanes to reset.
+        """
+
+        self.drone_speed[lanes] = 1
+        self.speed_step[lanes] = 1
+        self.drone_distance[lanes] = self.initial_distance[lanes]
+
+    def get_state(self) -> np.ndarray:
+        """
+            Returns:
+                np.ndarray: The (num_envs, 2) array of (drone_speed, drone_distance) states.
+        """
+
+        return np.stack((self.drone_speed, np.clip(self.drone_distance, 0, self.hidden_distance)), axis=1)
+
+    def reset(self, target_positions: int | np.ndarray | None = None) -> np.ndarray:
+        """
+            Reset every lane.
+
+            Args:
+                target_positions (int | np.ndarray): New target x-position(s). Keeps the previous ones if None.
+
+            Returns:
+                np.ndarray: The initial (num_envs, 2) states.
+        """
+
+        if target_positions is not None:
+            self.initial_distance[:] = self.config.distance_bins(target_positions)
+
+        self._reset_lanes(slice(None))
+        return self.get_state()
+
+    def step(self, actions: np.ndarray) -> tuple:
+        """
+            Take one step in every lane.
+
+            Args:
+                actions (np.ndarray): One action per lane (0: Increase, 1: Decrease, 2: Constant).
+
+            Returns:
+                tuple: The next states, rewards, dones and info of the batch. When autoreset is on, finished lanes
+                    are reset and info["final_state"] holds the states they finished in.
+        """
+
+        actions = np.asarray(actions)
+        in_control = self.drone_distance < self.max_distance
+
+        speed_up = in_control & (actions == 0)
+        slow_down = in_control & (actions == 1)
+        self.drone_speed = np.where(speed_up, np.minimum(self.drone_speed + 1, self.max_speed), self.drone_speed)
+        self.drone_speed = np.where(slow_down, np.maximum(self.drone_speed - 1, 0), self.drone_speed)
+        self.speed_step += in_control & ((actions == 0) | (actions == 1) | (actions == 2))
+
+        self.drone_distance -= self.drone_speed * self.speed_bins
+
+        low, high = self.target_distance_range
+        in_window = (low <= self.drone_distance) & (self.drone_distance <= high)
+        too_close = ~in_window & (self.drone_distance < high)
+
+        rewards = np.where(in_window, 10 // self.speed_step, np.where(too_close, -10, -1))
+        dones = in_window | too_close
+
+        states = self.get_state()
+        info = {}
+
+        if self.autoreset and dones.any():
+            info["final_state"] = states.copy()
+            self._reset_lanes(dones)
+            states[dones] = self.get_state()[dones]
+
+        return states, rewards, dones, info
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the throughput of VectorDroneEnv. test_vector_drone_env.py checks it against DroneEnv.")
+    parser.add_argument("--num-envs", type=int, default=4096, help="Number of lanes for the throughput run.")
+    parser.add_argument("--steps", type=int, default=1000, help="Number of batched steps for the throughput run.")
+    args = parser.parse_args()
+
+    env = VectorDroneEnv(args.num_envs)
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, 3, size=(args.steps, args.num_envs))
+
+    start = time.perf_counter()
+    for step_actions in actions:
+        env.step(step_actions)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.num_envs * args.steps / elapsed:,.0f} env steps/sec ({args.num_envs} lanes, {args.steps} steps)")
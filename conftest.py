@@ -0,0 +1,2 @@
+# test_agent.py is the interactive and batch evaluation script, not a test module
+collect_ignore = ["test_agent.py"]
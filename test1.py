@@ -1,40 +1,15 @@
 import gi
 import cv2
-import numpy as np
+import time
+import argparse
 
 gi.require_version('Gst', '1.0')
 from gi.repository import Gst, GLib
 
-class Tracker:
-    def __init__(self):
-        self.trackers = {}
-        self.locked_object_id = None
-        self.manual_tracker = None
-
-    def lock_object(self, frame, bbox):
-        """Lock an object for tracking"""
-        self.manual_tracker = cv2.TrackerCSRT_create()
-        self.manual_tracker.init(frame, bbox)
-
-    def track_object(self, frame):
-        """Track the manually selected object"""
-        if self.manual_tracker is not None:
-            success, bbox = self.manual_tracker.update(frame)
-            if success:
-                return [int(v) for v in bbox]
-        return None
-
-    def calculate_distance(self, object_size, focal_length, real_object_size):
-        """Estimate the distance of the object"""
-        distance = (real_object_size * focal_length) / object_size
-        return distance
-
-    def adjust_bbox(self, bbox, distance, max_distance=1000):
-        """Dynamically adjust the bounding box size based on distance"""
-        scale_factor = max(1, distance / max_distance)
-        new_bbox = (int(bbox[0] - scale_factor * 10), int(bbox[1] - scale_factor * 10),
-                    int(bbox[2] + scale_factor * 20), int(bbox[3] + scale_factor * 20))
-        return new_bbox
+from Tracker import Tracker
+from Frame_Source import AppSinkFrameSource
+from Gst_Pipeline import PRESETS, build_pipeline_description, add_pipeline_arguments, config_from_args
+from Metrics import MetricsRegistry, add_metrics_arguments, start_exporters, instrument_element, observe_glass_to_glass
 
 def on_message(bus, message, loop):
     message_type = message.type
@@ -46,15 +21,15 @@ def on_message(bus, message, loop):
         print(f"Error: {err}, {debug}")
         loop.quit()
 
-def main():
+PIPELINE_DESCRIPTION = build_pipeline_description(PRESETS["default"])
+
+def create_pipeline(description=PIPELINE_DESCRIPTION):
+    """Create the receiving pipeline and return it with its appsink and bus main loop"""
     # Initialize GStreamer
     Gst.init(None)
 
     # Create the pipeline
-    pipeline = Gst.parse_launch(
-        "udpsrc port=5600 ! application/x-rtp, payload=96 ! "
-        "rtph264depay ! avdec_h264 ! videoconvert ! video/x-raw,format=RGB ! appsink name=mysink"
-    )
+    pipeline = Gst.parse_launch(description)
 
     # Create a GLib MainLoop to handle the bus messages
     loop = GLib.MainLoop()
@@ -67,83 +42,110 @@ def main():
     # Get the appsink
     appsink = pipeline.get_by_name("mysink")
 
+    return pipeline, appsink, loop
+
+def draw_tracking(frame, bbox, distance, object_id=None, locked=True):
+    """Draw a tracked bounding box and its distance onto the frame, the locked object in blue and others in green"""
+    color = (255, 0, 0) if locked else (0, 255, 0)
+    label = "Manual Tracking" if object_id is None else f"Object {object_id}" + (" (locked)" if locked else "")
+
+    cv2.rectangle(frame,
+                 (bbox[0], bbox[1]),
+                 (bbox[0] + bbox[2], bbox[1] + bbox[3]),
+                 color, 2)
+    
+    cv2.putText(frame,
+               f"{label} - Distance: {distance:.2f} m", 
+               (bbox[0], bbox[1] - 10),
+               cv2.FONT_HERSHEY_SIMPLEX,
+               0.5,
+               color, 
+               2)
+
+def main(args):
+    pipeline, appsink, loop = create_pipeline(build_pipeline_description(config_from_args(args)))
+    frame_source = AppSinkFrameSource(appsink)
+
+    # Per-stage latency histograms
+    metrics = MetricsRegistry()
+    exporters = start_exporters(metrics, args)
+    decoder = pipeline.get_by_name("decoder")
+    if decoder is not None:
+        instrument_element(metrics, decoder, "decode")
+
     # Start playing the pipeline
     pipeline.set_state(Gst.State.PLAYING)
 
     # Initialize tracker
     tracker = Tracker()
-    manual_tracking_active = False
-    bbox_manual = None
 
     # Camera parameters
     focal_length = 800
     real_object_size = 5
 
     def on_mouse_click(event, x, y, flags, param):
-        nonlocal manual_tracking_active, bbox_manual
+        # Every click adds a target and makes it the locked one
         if event == cv2.EVENT_LBUTTONDOWN:
-            bbox_manual = (x - 25, y - 25, 50, 50)
-            tracker.lock_object(frame, bbox_manual)
-            manual_tracking_active = True
+            tracker.lock_object(frame, (x - 25, y - 25, 50, 50))
 
     cv2.namedWindow("GStreamer Video Stream")
     cv2.setMouseCallback("GStreamer Video Stream", on_mouse_click)
 
     try:
-        print("Streaming video... Press Ctrl+C to stop.")
+        print("Streaming video... Click to add a target, 1-9 to select one, 'u' to release it, 'q' or Ctrl+C to stop.")
         while True:
-            sample = appsink.emit("pull-sample")
-            if sample:
-                buffer = sample.get_buffer()
-                caps = sample.get_caps()
-
-                # Extract frame dimensions from caps
-                width = caps.get_structure(0).get_value('width')
-                height = caps.get_structure(0).get_value('height')
-
-                # Convert GStreamer sample to OpenCV frame
-                arr = np.ndarray((height, width, 3), dtype=np.uint8,
-                                 buffer=buffer.extract_dup(0, buffer.get_size()))
-                frame = arr.copy()
+            start = time.perf_counter()
+            sample_frame = frame_source.pull()
+            if sample_frame is None:
+                # pull-sample only returns None at end of stream; retrying would spin a core
+                print("End of stream")
+                break
+            metrics.observe("pull_sample", time.perf_counter() - start)
+
+            with sample_frame:
+                # Read-only view of the mapped buffer; copied only when the overlay is drawn
+                frame = sample_frame.image
 
                 # Manual tracking
-                if manual_tracking_active:
-                    bbox_manual = tracker.track_object(frame)
-                    
-                    if bbox_manual:    
-                        object_size_in_image = bbox_manual[2]
-                        distance = tracker.calculate_distance(object_size_in_image, focal_length, real_object_size)
-                        
-                        bbox_manual = tracker.adjust_bbox(bbox_manual, distance)
+                with metrics.time("track"):
+                    bboxes = tracker.track_all(frame)
 
-                        cv2.rectangle(frame,
-                                     (bbox_manual[0], bbox_manual[1]),
-                                     (bbox_manual[0] + bbox_manual[2], bbox_manual[1] + bbox_manual[3]),
-                                     (255, 0, 0), 2)
+                draw_start = time.perf_counter()
+                for object_id, bbox in bboxes.items():
+                    if bbox:    
+                        object_size_in_image = bbox[2]
+                        distance = tracker.calculate_distance(object_size_in_image, focal_length, real_object_size)
+                        distance = tracker.smooth_distance(distance, object_id)
                         
-                        cv2.putText(frame,
-                                   f"Manual Tracking - Distance: {distance:.2f} m", 
-                                   (bbox_manual[0], bbox_manual[1] - 10),
-                                   cv2.FONT_HERSHEY_SIMPLEX,
-                                   0.5,
-                                   (255, 0, 0), 
-                                   2)
+                        bbox = tracker.adjust_bbox(bbox, distance)
+                        frame = sample_frame.writable()
+                        draw_tracking(frame, bbox, distance, object_id, object_id == tracker.locked_object_id)
+                metrics.observe("draw", time.perf_counter() - draw_start)
 
-                cv2.imshow("GStreamer Video Stream", frame)
+                with metrics.time("display"):
+                    cv2.imshow("GStreamer Video Stream", frame)
+                    key = cv2.waitKey(1) & 0xFF
+                observe_glass_to_glass(metrics, pipeline, sample_frame.pts)
 
-                key = cv2.waitKey(1) & 0xFF
                 if key == ord("q"):
                     break
                 elif key == ord("u"):
-                    manual_tracking_active = False
-                    tracker.manual_tracker = None
+                    tracker.release_object()
+                elif ord("1") <= key <= ord("9") and key - ord("0") in tracker.trackers:
+                    tracker.select_object(key - ord("0"))
 
     except KeyboardInterrupt:
         print("Exiting...")
     finally:
         # Stop the pipeline and clean up
         pipeline.set_state(Gst.State.NULL)
+        tracker.close()
         cv2.destroyAllWindows()
+        for exporter in exporters:
+            exporter.stop()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Track objects in the drone's UDP video stream.")
+    add_pipeline_arguments(parser)
+    add_metrics_arguments(parser)
+    main(parser.parse_args())
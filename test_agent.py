@@ -1,12 +1,16 @@
+import argparse
 import pygame
 
-from Drone_Env import DroneEnv
+from Drone_Env import DroneEnv, add_config_arguments, config_from_args
 from Agent import QLearningAgent
+from Evaluate import add_evaluation_arguments, main as evaluate
+from Training_Metrics import setup_logging, add_logging_arguments
 
-def test_agent() -> None:
-    env = DroneEnv()
+def play(filename: str = "agent.pkl", config=None) -> None:
+    """Fly the agent to targets placed by clicking in the window, until the window is closed"""
+    env = DroneEnv(config=config)
     agent = QLearningAgent(env)
-    agent.load_agent()
+    agent.load_agent(filename, read_only=True)
 
     while True:
         done = False
@@ -20,17 +24,12 @@ def test_agent() -> None:
 
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     x, _ = pygame.mouse.get_pos()
-                    
-                    positions = [i for i in range(0, env.screen_width, env.scale)]
-                    x = min(positions, key=lambda p: abs(p - x)) + env.scale // 2 # Round to the nearest grid position
-
-                    target_position = (x, env.screen_height // 2)
+                    target_position = (env.snap_to_grid(x), env.screen_height // 2)
                     
                     state = env.reset(target_position=target_position)
                     target_position_set = True
 
             env.render()
-            pygame.display.flip()
             # pygame.time.Clock().tick(60)
 
         while not done:
@@ -39,7 +38,6 @@ def test_agent() -> None:
             state = next_state
 
             env.render()
-            pygame.display.flip()
             pygame.time.Clock().tick(60)
 
             for event in pygame.event.get():
@@ -48,4 +46,15 @@ def test_agent() -> None:
                     exit()
 
 if __name__ == "__main__":
-    test_agent()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Evaluate a trained agent headless, or place targets by clicking with --interactive.")
+    parser.add_argument("--interactive", action="store_true", help="Open the window and fly the agent to clicked targets.")
+    add_evaluation_arguments(parser)
+    add_config_arguments(parser)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(args)
+
+    if args.interactive:
+        play(args.agent, config_from_args(args))
+    else:
+        evaluate(args)
@@ -0,0 +1,20 @@
+import numpy as np
+
+from Drone_Env import DroneConfig
+from Controller import SpeedController
+
+def test_quantize_round_trips_bin_distances() -> None:
+    # Fine and odd resolutions are where a plain int(distance / resolution) lands one bin low
+    for resolution in (0.1, 0.5, 0.7, 1.0):
+        config = DroneConfig(world_length=300.0, horizon=200.0, distance_resolution=resolution, speed_resolution=resolution)
+        controller = SpeedController(np.zeros(config.q_table_shape), config)
+        for distance_bin in range(2000):
+            expected = min(distance_bin, config.hidden_bin)
+            assert controller.quantize(distance_bin * resolution) == expected, (resolution, distance_bin)
+
+def test_quantize_lost_and_negative_distances() -> None:
+    config = DroneConfig()
+    controller = SpeedController(np.zeros(config.q_table_shape), config)
+    assert controller.quantize(None) == config.hidden_bin
+    assert controller.quantize(float("nan")) == config.hidden_bin
+    assert controller.quantize(-0.3) == 0
@@ -0,0 +1,42 @@
+import Metrics
+from Metrics import Histogram
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_summary_covers_the_previous_window_after_a_rotation(monkeypatch) -> None:
+    clock = FakeClock()
+    monkeypatch.setattr(Metrics.time, "monotonic", clock)
+    histogram = Histogram(window=60.0)
+
+    for _ in range(1000):
+        histogram.observe(0.1)
+    clock.now += 61
+    histogram.observe(0.001)
+
+    summary = histogram.summary()
+    assert summary["count"] == 1001
+    assert summary["max_ms"] == 100.0
+    # 0.1 s falls in the bucket up to about 0.1259 s; percentiles stay inside it and below the max
+    for name in ("p50_ms", "p90_ms", "p99_ms"):
+        assert 79.0 < summary[name] <= 100.0
+
+def test_summary_drops_windows_older_than_two_windows(monkeypatch) -> None:
+    clock = FakeClock()
+    monkeypatch.setattr(Metrics.time, "monotonic", clock)
+    histogram = Histogram(window=60.0)
+
+    histogram.observe(0.1)
+    clock.now += 61
+    histogram.observe(0.001)
+    clock.now += 130
+    assert histogram.summary() == {"count": 0}
+
+    histogram.observe(0.002)
+    summary = histogram.summary()
+    assert summary["count"] == 1
+    assert summary["max_ms"] == 2.0
@@ -0,0 +1,29 @@
+import numpy as np
+
+from Motion_Model import ScalarKalmanFilter
+from Tracker import Tracker
+
+def step_response(distance_filter: ScalarKalmanFilter, before: float = 10.0, after: float = 20.0, settle: int = 100,
+                  frames: int = 10) -> np.ndarray:
+    """Settle the filter on a constant value, then return its outputs for the frames after a step"""
+    for _ in range(settle):
+        distance_filter.update(before)
+    return np.array([distance_filter.update(after) for _ in range(frames)])
+
+def test_distance_smoothing_follows_a_step_within_a_few_frames() -> None:
+    tracker = Tracker()
+    response = step_response(ScalarKalmanFilter(tracker.distance_process_noise, tracker.distance_noise))
+    progress = (response - 10.0) / 10.0
+
+    # Steady-state gain of about 0.39: 39% of the step after one frame, 90% after five
+    assert 0.35 < progress[0] < 0.45
+    assert progress[4] > 0.9
+    assert np.all(np.diff(progress) > 0)
+
+def test_distance_smoothing_reduces_noise() -> None:
+    tracker = Tracker()
+    distance_filter = ScalarKalmanFilter(tracker.distance_process_noise, tracker.distance_noise)
+    measurements = 50.0 + np.random.default_rng(0).normal(0, tracker.distance_noise, 5000)
+    filtered = np.array([distance_filter.update(value) for value in measurements])
+
+    assert filtered[100:].std() < 0.6 * measurements[100:].std()
@@ -0,0 +1,91 @@
+import numpy as np
+
+from Drone_Env import DroneEnv, DroneConfig
+from Vector_Drone_Env import VectorDroneEnv
+from Planner import MAX_SPEED_STEP
+
+CONFIGS = [DroneConfig(), DroneConfig(world_length=300.0, horizon=120.0, distance_resolution=0.5, target_window=(0.0, 2.5))]
+
+def check_every_transition(config: DroneConfig | None = None) -> int:
+    """
+        Step every (speed, distance, speed_step) state with every action through VectorDroneEnv, one lane each, and
+        through DroneEnv one at a time, and assert both give the same next state, reward and done.
+
+        Distances run from 0 up to the start distance of an off-screen target, speed steps one past MAX_SPEED_STEP.
+
+        Returns:
+            int: The number of transitions compared.
+    """
+
+    config = config or DroneConfig()
+    max_distance = config.distance_bins(config.screen_width + 1)
+    shape = (config.num_speeds, max_distance + 1, MAX_SPEED_STEP + 1)
+    speed, distance, speed_step = (np.repeat(grid.ravel(), 3) for grid in np.indices(shape))
+    speed_step = speed_step + 1
+    actions = np.tile(np.arange(3), len(speed) // 3)
+
+    vector_env = VectorDroneEnv(len(speed), autoreset=False, config=config)
+    vector_env.drone_speed[:] = speed
+    vector_env.drone_distance[:] = distance
+    vector_env.speed_step[:] = speed_step
+    states, rewards, dones, _ = vector_env.step(actions)
+
+    env = DroneEnv(headless=True, config=config)
+    env.set_variables()
+    for i, lane in enumerate(zip(speed.tolist(), distance.tolist(), speed_step.tolist(), actions.tolist())):
+        env.drone_speed, env.drone_distance, env.speed_step, action = lane
+        state, reward, done, _ = env.step(action)
+
+        assert np.array_equal(state, states[i]), f"{lane}: state {states[i]} != {state}"
+        assert rewards[i] == reward, f"{lane}: reward {rewards[i]} != {reward}"
+        assert dones[i] == done, f"{lane}: done {dones[i]} != {done}"
+
+    return len(speed)
+
+def check_rollouts(num_envs: int = 64, steps: int = 2000, seed: int = 0, config: DroneConfig | None = None) -> None:
+    """
+        Step VectorDroneEnv and one DroneEnv per lane with the same random actions, resetting finished lanes, and
+        assert they agree. Covers autoreset and the final states it reports.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    template = DroneEnv(headless=True, config=config)
+    template.set_variables()
+    positions = np.arange(template.drone_position[0] + 6 * template.scale, template.screen_width, template.scale) + template.scale // 2
+    target_x = rng.choice(positions, size=num_envs)
+
+    vector_env = VectorDroneEnv(num_envs, target_positions=target_x, config=config)
+    envs = [DroneEnv(headless=True, config=config) for _ in range(num_envs)]
+    for env, x in zip(envs, target_x):
+        env.set_variables(target_position=(int(x), env.screen_height // 2))
+
+    for _ in range(steps):
+        actions = rng.integers(0, 3, size=num_envs)
+        states, rewards, dones, info = vector_env.step(actions)
+
+        for i, env in enumerate(envs):
+            state, reward, done, _ = env.step(int(actions[i]))
+            final_state = info["final_state"][i] if done else states[i]
+
+            assert np.array_equal(state, final_state), f"Lane {i}: state {final_state} != {state}"
+            assert rewards[i] == reward, f"Lane {i}: reward {rewards[i]} != {reward}"
+            assert dones[i] == done, f"Lane {i}: done {dones[i]} != {done}"
+
+            if done:
+                env.reset(target_position=(int(target_x[i]), env.screen_height // 2))
+                assert np.array_equal(env.state, states[i]), f"Lane {i}: reset state {states[i]} != {env.state}"
+
+def test_every_transition() -> None:
+    for config in CONFIGS:
+        check_every_transition(config)
+
+def test_rollouts() -> None:
+    for config in CONFIGS:
+        check_rollouts(config=config)
+
+if __name__ == "__main__":
+    for config in CONFIGS:
+        print(f"VectorDroneEnv matches DroneEnv on all {check_every_transition(config)} transitions of {config}")
+        check_rollouts(config=config)
+        print("VectorDroneEnv matches DroneEnv over 64 lanes x 2000 random steps")